@@ -3,6 +3,9 @@
 # @file PID.py
 # @brief PIDの計算
 
+import struct
+import numpy as np
+
 ##
 # @class PID
 # @brief PIDの計算
@@ -36,6 +39,19 @@ class PID:
             self.output_min = 0           # < 出力制限時の最小値
             self.output_max = 0           # < 出力制限時の最大値
 
+    ##
+    # @brief 内部状態のバイト列の形式（リトルエンディアン，104バイト）
+    # @details mode, need_saturation, Kp, Ki, Kd, output_min, output_max,
+    #          diff[0], diff[1], diff[2], prev_val, prev_target, integral, output の順
+    state_struct = struct.Struct('<ii12d')
+
+    ##
+    # @brief 内部状態のレコード型（state_structと同じ並び）
+    state_dtype = np.dtype([('mode', '<i4'), ('need_saturation', '<i4'),
+                            ('gain', '<f8', (3,)), ('output_range', '<f8', (2,)),
+                            ('diff', '<f8', (3,)), ('prev_val', '<f8'), ('prev_target', '<f8'),
+                            ('integral', '<f8'), ('output', '<f8')])
+
     ##
     # @brief コンストラクタ
     def __init__(self, param=None):
@@ -49,11 +65,11 @@ class PID:
     ##
     # @brief リセット
     def reset(self):
-        for i in range(len(self.__diff[i])):
+        for i in range(len(self.__diff)):
             self.__diff[i] = 0
-        prev_val = prev_target = 0
-        integral = 0
-        output = 0
+        self.__prev_val = self.__prev_target = 0
+        self.__integral = 0
+        self.__output = 0
 
     ##
     # @brief パラメータの設定
@@ -93,11 +109,11 @@ class PID:
 
         if (self.__param.mode == PID.Mode().pPID):
             self.__output = self.__calculate_pPID(target, now_val, dt)
-        elif (self.__param.mode == PID.Mode().pPID):
+        elif (self.__param.mode == PID.Mode().sPID):
             self.__output = self.__calculate_sPID(target, now_val, dt)
-        elif (self.__param.mode == PID.Mode().pPID):
+        elif (self.__param.mode == PID.Mode().PI_D):
             self.__output = self.__calculate_PI_D(target, now_val, dt)
-        elif (self.__param.mode == PID.Mode().pPID):
+        elif (self.__param.mode == PID.Mode().I_PD):
             self.__output = self.__calculate_I_PD(target, now_val, dt)
 
         # 次回ループのために今回の値を前回の値にする
@@ -113,6 +129,81 @@ class PID:
             if (self.__output < self.__param.output_min):
                 self.__output = self.__param.output_min
 
+    ##
+    # @brief 内部状態（パラメータを含む）の取得
+    # @return state_structの形式のバイト列
+    def getState(self):
+        param = self.__param if self.__param is not None else PID.param_t()
+        return PID.state_struct.pack(
+            int(param.mode), int(bool(param.need_saturation)),
+            param.gain.Kp, param.gain.Ki, param.gain.Kd, param.output_min, param.output_max,
+            self.__diff[0], self.__diff[1], self.__diff[2],
+            self.__prev_val, self.__prev_target, self.__integral, self.__output)
+
+    ##
+    # @brief 内部状態（パラメータを含む）の設定
+    # @param state: getState()で取得したバイト列もしくはstate_dtypeのレコード
+    # @details パラメータは新しいparam_tとして設定するため，他のPIDと共有していたparam_tは変更しない
+    def setState(self, state):
+        if isinstance(state, np.void):
+            state = state.tobytes()
+        (mode, need_saturation, kp, ki, kd, output_min, output_max,
+         diff0, diff1, diff2, prev_val, prev_target, integral, output) = PID.state_struct.unpack(state)
+        param = PID.param_t()
+        param.mode = mode
+        param.gain = PID.gain_t(kp, ki, kd)
+        param.need_saturation = bool(need_saturation)
+        param.output_min = output_min
+        param.output_max = output_max
+        self.__param = param
+        self.__diff = [diff0, diff1, diff2]
+        self.__prev_val = prev_val
+        self.__prev_target = prev_target
+        self.__integral = integral
+        self.__output = output
+
+    ##
+    # @brief 複数のPIDの内部状態を一括で取得
+    # @param pids: PIDのリスト
+    # @return state_dtypeの配列
+    @staticmethod
+    def getStates(pids):
+        buf = b''.join([pid.getState() for pid in pids])
+        return np.frombuffer(buf, dtype=PID.state_dtype).copy()
+
+    ##
+    # @brief 複数のPIDの内部状態を一括で設定
+    # @param pids: PIDのリスト
+    # @param states: state_dtypeの配列
+    @staticmethod
+    def setStates(pids, states):
+        states = np.ascontiguousarray(states, dtype=PID.state_dtype)
+        size = PID.state_struct.size
+        buf = memoryview(states.tobytes())
+        for i, pid in enumerate(pids):
+            pid.setState(buf[i * size:(i + 1) * size])
+
+    ##
+    # @brief 複数のPIDの内部状態をファイルに保存
+    # @param file: ファイル名もしくはファイルオブジェクト
+    # @param pids: PIDのリスト
+    @staticmethod
+    def saveStates(file, pids):
+        np.save(file, PID.getStates(pids), allow_pickle=False)
+
+    ##
+    # @brief 複数のPIDの内部状態をファイルから復元
+    # @param file: ファイル名もしくはファイルオブジェクト
+    # @param pids: 復元先のPIDのリスト（Noneなら新しく生成）
+    # @return 復元したPIDのリスト
+    @staticmethod
+    def loadStates(file, pids=None):
+        states = np.load(file, allow_pickle=False)
+        if pids is None:
+            pids = [PID() for _ in range(len(states))]
+        PID.setStates(pids, states)
+        return pids
+
     ##
     # @brief 制御量（PIDの計算結果）の取得
     # @return 制御量（PIDの計算結果）
@@ -129,11 +220,11 @@ class PID:
 
     # 速度型PID
     def __calculate_sPID(self, target, now_val, dt):
-        p = self.__param.gain.Kp * self.__diff[0] - self.__diff[1]
+        p = self.__param.gain.Kp * (self.__diff[0] - self.__diff[1])
         i = self.__param.gain.Ki * self.__diff[0] * dt
         d = self.__param.gain.Kd * \
             (self.__diff[0] - 2 * self.__diff[1] + self.__diff[2]) / dt
-        return self.__prev_val + p + i + d
+        return self.__output + (p + i + d)
 
     # 微分先行型PID
     def __calculate_PI_D(self, target, now_val, dt):
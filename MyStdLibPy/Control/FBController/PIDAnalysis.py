@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+##
+# @file PIDAnalysis.py
+# @brief PIDの周波数応答・ステップ応答の一括解析
+
+import numpy as np
+import MyStdLibPy.Control.FBController.PID as PID
+
+##
+# @class PIDAnalysis
+# @brief PIDの周波数応答・ステップ応答の一括解析
+# @details PIDの各モードの離散時間伝達関数をz^-1の多項式の比で表し，
+#          G組のゲインについてボード線図，ゲイン余裕・位相余裕，閉ループのステップ応答を配列演算で一度に求める．
+#          伝達関数の係数は(G, 次数 + 1)の配列で，k列目がz^-kの係数．
+#          制御対象（プラント）もz^-1の多項式の比(num, den)で与える（Noneなら1）．
+#
+#          位置型PID（積分は台形則）: C(z) = Kp + Ki*dt/2*(1 + z^-1)/(1 - z^-1) + Kd*(1 - z^-1)/dt
+#          速度型PID（積分は後退差分）: C(z) = Kp + Ki*dt/(1 - z^-1) + Kd*(1 - z^-1)/dt
+#          微分先行型PID，比例微分先行型PIDのフィードバック側は位置型PIDと同じで，
+#          目標値側はそれぞれKp + Ki*dt/2*(1 + z^-1)/(1 - z^-1)，Ki*dt/2*(1 + z^-1)/(1 - z^-1)となる．
+
+class PIDAnalysis:
+    ##
+    # @brief コンストラクタ
+    # @param mode: PIDモードenum
+    # @param gain: ゲイン構造体（PID.gain_t）もしくはそのリスト
+    # @param dt: 制御周期
+    # @param plant: 制御対象の伝達関数(num, den)（Noneなら1）
+    def __init__(self, mode, gain, dt, plant=None):
+        if isinstance(gain, PID.gain_t):
+            gain = [gain]
+        kp = np.array([g.Kp for g in gain], dtype=float)
+        ki = np.array([g.Ki for g in gain], dtype=float)
+        kd = np.array([g.Kd for g in gain], dtype=float)
+        self.setGain(mode, kp, ki, kd, dt, plant)
+
+    ##
+    # @brief ゲインを配列で設定
+    # @param mode: PIDモードenum
+    # @param kp: 比例ゲイン（長さGの配列）
+    # @param ki: 積分ゲイン（長さGの配列）
+    # @param kd: 微分ゲイン（長さGの配列）
+    # @param dt: 制御周期
+    # @param plant: 制御対象の伝達関数(num, den)（Noneなら1）
+    def setGain(self, mode, kp, ki, kd, dt, plant=None):
+        kp, ki, kd = np.broadcast_arrays(np.atleast_1d(np.asarray(kp, dtype=float)),
+                                         np.atleast_1d(np.asarray(ki, dtype=float)),
+                                         np.atleast_1d(np.asarray(kd, dtype=float)))
+        mode_list = PID.Mode()
+        zero = np.zeros_like(kp)
+        if mode == mode_list.sPID:
+            fb_num = np.stack([kp + ki * dt + kd / dt, -kp - 2 * kd / dt, kd / dt], axis=1)
+            ref_num = fb_num
+        else:
+            trapezoid = ki * dt / 2.0
+            fb_num = np.stack([kp + trapezoid + kd / dt, -kp + trapezoid - 2 * kd / dt, kd / dt], axis=1)
+            if mode == mode_list.PI_D:
+                ref_num = np.stack([kp + trapezoid, -kp + trapezoid, zero], axis=1)
+            elif mode == mode_list.I_PD:
+                ref_num = np.stack([trapezoid, trapezoid, zero], axis=1)
+            else:
+                ref_num = fb_num
+        den = np.broadcast_to([1.0, -1.0, 0.0], fb_num.shape)
+
+        if plant is None:
+            plant = ([1.0], [1.0])
+        plant_num = np.atleast_2d(np.asarray(plant[0], dtype=float))
+        plant_den = np.atleast_2d(np.asarray(plant[1], dtype=float))
+
+        self.__mode = mode
+        self.__dt = dt
+        self.__size = len(kp)
+        self.__controller = (fb_num, den)
+        self.__reference = (ref_num, den)
+        self.__plant = (plant_num, plant_den)
+
+    ##
+    # @brief ゲインの組数の取得
+    def getSize(self):
+        return self.__size
+
+    ##
+    # @brief フィードバック側の伝達関数の取得
+    # @return (num, den)
+    def getController(self):
+        return self.__controller
+
+    ##
+    # @brief 目標値側の伝達関数の取得
+    # @return (num, den)
+    def getReferenceController(self):
+        return self.__reference
+
+    ##
+    # @brief 開ループ伝達関数（フィードバック側のPID × 制御対象）の取得
+    # @return (num, den)
+    def getLoop(self):
+        num, den = self.__controller
+        plant_num, plant_den = self.__plant
+        return PIDAnalysis.__polymul(num, plant_num), PIDAnalysis.__polymul(den, plant_den)
+
+    ##
+    # @brief 目標値から出力までの閉ループ伝達関数の取得
+    # @return (num, den)
+    def getClosedLoop(self):
+        fb_num, den = self.__controller
+        ref_num, _ = self.__reference
+        plant_num, plant_den = self.__plant
+        num = PIDAnalysis.__polymul(ref_num, plant_num)
+        den = PIDAnalysis.__polyadd(PIDAnalysis.__polymul(den, plant_den),
+                                    PIDAnalysis.__polymul(fb_num, plant_num))
+        return num, den
+
+    ##
+    # @brief 既定の角周波数の配列の取得
+    # @param num: 点数
+    # @return ナイキスト周波数の1/1000からナイキスト周波数までの対数間隔の角周波数[rad/s]
+    def getFrequency(self, num=512):
+        nyquist = np.pi / self.__dt
+        return np.logspace(np.log10(nyquist) - 3, np.log10(nyquist), num)
+
+    ##
+    # @brief 周波数応答の計算
+    # @param omega: 角周波数[rad/s]の配列（Noneなら既定の配列）
+    # @param loop: trueなら開ループ，falseならPID単体（フィードバック側）
+    # @return (G, 角周波数の数)の複素数配列
+    def frequencyResponse(self, omega=None, loop=True):
+        if omega is None:
+            omega = self.getFrequency()
+        num, den = self.getLoop() if loop else self.__controller
+        return self.__evaluate(num, omega) / self.__evaluate(den, omega)
+
+    ##
+    # @brief ボード線図の計算
+    # @param omega: 角周波数[rad/s]の配列（Noneなら既定の配列）
+    # @param loop: trueなら開ループ，falseならPID単体（フィードバック側）
+    # @return (ゲイン[dB], 位相[deg])，いずれも(G, 角周波数の数)の配列．位相は角周波数方向にアンラップする
+    def bode(self, omega=None, loop=True):
+        response = self.frequencyResponse(omega, loop)
+        with np.errstate(divide='ignore'):
+            magnitude = 20.0 * np.log10(np.abs(response))
+        phase = np.degrees(np.unwrap(np.angle(response), axis=1))
+        return magnitude, phase
+
+    ##
+    # @brief ゲイン余裕・位相余裕の計算
+    # @param omega: 角周波数[rad/s]の配列（Noneなら既定の配列）
+    # @return (ゲイン余裕[dB], 位相余裕[deg], 位相交差周波数[rad/s], ゲイン交差周波数[rad/s])，
+    #         いずれも長さGの配列．交差が無い場合は余裕をinf，周波数をnanとする
+    # @details 開ループの周波数応答を角周波数方向に線形補間して交差点を求め，交差が複数ある場合は最も小さい余裕を返す
+    def margins(self, omega=None):
+        if omega is None:
+            omega = self.getFrequency()
+        omega = np.asarray(omega, dtype=float)
+        response = self.frequencyResponse(omega)
+        r0 = response[:, :-1]
+        r1 = response[:, 1:]
+
+        # 位相交差：虚部の符号が変わり（0を含む），その点で実部が負
+        # ナイキスト周波数のように虚部が丸め誤差程度になる点は0とみなす
+        imag = np.where(np.abs(response.imag) <= 1e-9 * np.abs(response), 0.0, response.imag)
+        im0 = imag[:, :-1]
+        im1 = imag[:, 1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(im0 == im1, 0.0, np.clip(im0 / (im0 - im1), 0.0, 1.0))
+            point = r0 + (r1 - r0) * t
+            crossing = (im0 * im1 <= 0) & (point.real < 0)
+            gain_margin = np.where(crossing, -20.0 * np.log10(np.abs(point)), np.inf)
+        phase_crossover = np.argmin(gain_margin, axis=1)
+
+        # ゲイン交差：ゲインが1をまたぐ
+        with np.errstate(divide='ignore', invalid='ignore'):
+            m0 = np.log10(np.abs(r0))
+            m1 = np.log10(np.abs(r1))
+            s = np.clip(m0 / (m0 - m1), 0.0, 1.0)
+            point = r0 + (r1 - r0) * s
+            crossing = np.signbit(m0) != np.signbit(m1)
+            angle = np.degrees(np.angle(point)) + 180.0
+            angle = np.mod(angle + 180.0, 360.0) - 180.0
+            phase_margin = np.where(crossing, angle, np.inf)
+        gain_crossover = np.argmin(phase_margin, axis=1)
+
+        rows = np.arange(self.__size)
+        gm = gain_margin[rows, phase_crossover]
+        pm = phase_margin[rows, gain_crossover]
+        w_pc = omega[phase_crossover] + (omega[phase_crossover + 1] - omega[phase_crossover]) * t[rows, phase_crossover]
+        w_gc = omega[gain_crossover] + (omega[gain_crossover + 1] - omega[gain_crossover]) * s[rows, gain_crossover]
+        w_pc = np.where(np.isfinite(gm), w_pc, np.nan)
+        w_gc = np.where(np.isfinite(pm), w_gc, np.nan)
+        return gm, pm, w_pc, w_gc
+
+    ##
+    # @brief 閉ループのステップ応答の計算
+    # @param num: サンプル数
+    # @return (G, num)の配列（k列目は時刻k*dtの出力）
+    # @details 閉ループ伝達関数を可制御正準形の状態空間表現に変換し，
+    #          ステップ入力に対する状態の系列を区間を倍々に伸ばしながら求める（ループ回数はlog2(num)回）
+    def stepResponse(self, num):
+        b, a = self.getClosedLoop()
+        b, a = np.broadcast_arrays(*PIDAnalysis.__pad(b, a))
+        b = b / a[:, :1]
+        a = a / a[:, :1]
+        order = a.shape[1] - 1
+        size = a.shape[0]
+        if order == 0:
+            return np.repeat(b[:, :1], num, axis=1)
+
+        # 可制御正準形 x[k+1] = A x[k] + B u[k], y[k] = C x[k] + D u[k]
+        A = np.zeros((size, order, order))
+        A[:, 0, :] = -a[:, 1:]
+        A[:, np.arange(1, order), np.arange(order - 1)] = 1.0
+        C = b[:, 1:] - a[:, 1:] * b[:, :1]
+        D = b[:, 0]
+
+        # u[k] = 1, x[0] = 0 のとき x[L + j] = A^L x[j] + x[L] (0 <= j < L)
+        # 状態は(G, 次数, 時刻)の並びで持ち，A^Lを左から掛ける
+        length = 1
+        while length < num:
+            length *= 2
+        states = np.zeros((size, order, length))
+        power = A
+        filled = 1
+        while filled < num:
+            following = A @ states[:, :, filled - 1:filled]
+            following[:, 0] += 1.0
+            block = states[:, :, filled:2 * filled]
+            np.matmul(power, states[:, :, :filled], out=block)
+            block += following
+            power = power @ power
+            filled *= 2
+        return (C[:, None, :] @ states[:, :, :num])[:, 0, :] + D[:, None]
+
+    # z^-1の多項式をz = exp(j*omega*dt)で評価する
+    def __evaluate(self, coef, omega):
+        k = np.arange(coef.shape[1])
+        basis = np.exp(-1j * np.outer(k, np.asarray(omega, dtype=float) * self.__dt))
+        return coef @ basis
+
+    # z^-1の多項式の積
+    @staticmethod
+    def __polymul(a, b):
+        a = np.atleast_2d(a)
+        b = np.atleast_2d(b)
+        rows = max(a.shape[0], b.shape[0])
+        out = np.zeros((rows, a.shape[1] + b.shape[1] - 1))
+        for i in range(b.shape[1]):
+            out[:, i:i + a.shape[1]] += a * b[:, i:i + 1]
+        return out
+
+    # z^-1の多項式の和
+    @staticmethod
+    def __polyadd(a, b):
+        a, b = PIDAnalysis.__pad(a, b)
+        return a + b
+
+    # 2つの係数配列の次数を揃える
+    @staticmethod
+    def __pad(a, b):
+        a = np.atleast_2d(a)
+        b = np.atleast_2d(b)
+        width = max(a.shape[1], b.shape[1])
+        a = np.pad(a, ((0, 0), (0, width - a.shape[1])))
+        b = np.pad(b, ((0, 0), (0, width - b.shape[1])))
+        return a, b
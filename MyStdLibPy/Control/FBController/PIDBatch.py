@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+##
+# @file PIDBatch.py
+# @brief 複数のPIDの一括計算
+
+import numpy as np
+import MyStdLibPy.Control.FBController.PID as PID
+
+##
+# @class PIDBatch
+# @brief 複数のPIDの一括計算
+# @details N個のPIDの内部状態を長さNの配列で保持し，1回のupdate()で全要素をベクトル演算で更新する．
+#          要素ごとにモード，ゲイン，出力制限を設定できる．各モードの計算式はPIDと同じ．
+
+class PIDBatch:
+    ##
+    # @brief コンストラクタ
+    # @param size: 要素数
+    # @param param: 全要素に設定するパラメータ構造体（PID.param_t）
+    def __init__(self, size=0, param=None):
+        self.__size = 0
+        self.__mode = np.zeros(0, dtype=int)
+        self.__gain = np.zeros((3, 0))  # 0: Kp, 1: Ki, 2: Kd
+        self.__need_saturation = np.zeros(0, dtype=bool)
+        self.__output_range = np.zeros((2, 0))  # 0: 最小値, 1: 最大値
+        self.__diff = np.zeros((3, 0))  # 0: 現在, 1: 過去, 2: 大過去
+        self.__prev_val = np.zeros(0)
+        self.__prev_target = np.zeros(0)
+        self.__integral = np.zeros(0)
+        self.__output = np.zeros(0)
+        self.resize(size, param)
+
+    ##
+    # @brief 要素数の変更
+    # @param size: 要素数
+    # @param param: 追加した要素に設定するパラメータ構造体（PID.param_t）
+    # @details 既存の要素の状態は保持する
+    def resize(self, size, param=None):
+        old = self.__size
+
+        def fit(a, fill=0):
+            shape = a.shape[:-1] + (size,)
+            b = np.full(shape, fill, dtype=a.dtype)
+            n = min(old, size)
+            b[..., :n] = a[..., :n]
+            return b
+
+        self.__mode = fit(self.__mode, PID.Mode().pPID)
+        self.__gain = fit(self.__gain)
+        self.__need_saturation = fit(self.__need_saturation, False)
+        self.__output_range = fit(self.__output_range)
+        self.__diff = fit(self.__diff)
+        self.__prev_val = fit(self.__prev_val)
+        self.__prev_target = fit(self.__prev_target)
+        self.__integral = fit(self.__integral)
+        self.__output = fit(self.__output)
+        self.__size = size
+        if size > old and param is not None:
+            self.setParam(param, np.arange(old, size))
+
+    ##
+    # @brief 要素数の取得
+    def getSize(self):
+        return self.__size
+
+    ##
+    # @brief リセット
+    # @param index: リセットする要素（Noneなら全要素）
+    def reset(self, index=None):
+        if index is None:
+            index = slice(None)
+        self.__diff[:, index] = 0
+        self.__prev_val[index] = 0
+        self.__prev_target[index] = 0
+        self.__integral[index] = 0
+        self.__output[index] = 0
+
+    ##
+    # @brief パラメータの設定
+    # @param param: パラメータ構造体（PID.param_t）
+    # @param index: 設定する要素（Noneなら全要素）
+    def setParam(self, param, index=None):
+        if index is None:
+            index = slice(None)
+        self.__mode[index] = param.mode
+        self.setGain(param.gain, index)
+        self.__need_saturation[index] = param.need_saturation
+        self.__output_range[0, index] = param.output_min
+        self.__output_range[1, index] = param.output_max
+
+    ##
+    # @brief ゲインの設定
+    # @param gain: ゲイン構造体（PID.gain_t）
+    # @param index: 設定する要素（Noneなら全要素）
+    def setGain(self, gain, index=None):
+        if index is None:
+            index = slice(None)
+        self.__gain[0, index] = gain.Kp
+        self.__gain[1, index] = gain.Ki
+        self.__gain[2, index] = gain.Kd
+
+    ##
+    # @brief PIDモードの設定
+    # @param mode: PIDモードenum
+    # @param index: 設定する要素（Noneなら全要素）
+    def setMode(self, mode, index=None):
+        if index is None:
+            index = slice(None)
+        self.__mode[index] = mode
+
+    ##
+    # @brief 出力の最小，最大値の設定
+    # @param min_v: 最小値
+    # @param max_v: 最大値
+    # @param index: 設定する要素（Noneなら全要素）
+    def setSaturation(self, min_v, max_v, index=None):
+        if index is None:
+            index = slice(None)
+        self.__need_saturation[index] = True
+        self.__output_range[0, index] = min_v
+        self.__output_range[1, index] = max_v
+
+    ##
+    # @brief 値の更新
+    # @param target: 目標値（スカラもしくは長さNの配列）
+    # @param now_val: 現在値（スカラもしくは長さNの配列）
+    # @param dt: 前回この関数をコールしてからの経過時間（スカラもしくは長さNの配列）
+    # @param index: 更新する要素（Noneなら全要素）
+    # @details indexを指定した場合，target，now_val，dtはindexで選んだ要素数に合わせる
+    def update(self, target, now_val, dt, index=None):
+        if index is None:
+            index = slice(None)
+        target = np.asarray(target, dtype=float)
+        now_val = np.asarray(now_val, dtype=float)
+        dt = np.asarray(dt, dtype=float)
+
+        diff = self.__diff[:, index]
+        diff[0] = target - now_val  # 最新の偏差
+        integral = self.__integral[index] + (diff[0] + diff[1]) * (dt / 2.0)  # 積分
+        prev_val = self.__prev_val[index]
+        kp, ki, kd = self.__gain[:, index]
+        mode = self.__mode[index]
+        mode_list = PID.Mode()
+
+        # 位置型PID
+        p_pid = kp * diff[0] + ki * integral + kd * ((diff[0] - diff[1]) / dt)
+        # 速度型PID
+        s_pid = self.__output[index] + (kp * (diff[0] - diff[1]) + ki * diff[0] * dt
+                                        + kd * (diff[0] - 2 * diff[1] + diff[2]) / dt)
+        # 微分先行型PID
+        d_val = -kd * ((now_val - prev_val) / dt)
+        pi_d = kp * diff[0] + ki * integral + d_val
+        # 比例微分先行型PID
+        i_pd = -kp * now_val + ki * integral + d_val
+
+        output = np.select([mode == mode_list.pPID, mode == mode_list.sPID,
+                            mode == mode_list.PI_D, mode == mode_list.I_PD],
+                           [p_pid, s_pid, pi_d, i_pd], self.__output[index])
+
+        # ガード処理
+        saturation = self.__need_saturation[index]
+        output_min, output_max = self.__output_range[:, index]
+        output = self.__saturate(output, saturation, output_min, output_max)
+
+        # 次回ループのために今回の値を前回の値にする
+        diff[2] = diff[1]
+        diff[1] = diff[0]
+        self.__diff[:, index] = diff
+        self.__integral[index] = integral
+        self.__prev_target[index] = target
+        self.__prev_val[index] = now_val
+        self.__output[index] = output
+
+    ##
+    # @brief 複数ステップ分の値の一括更新
+    # @param target: 目標値（(T, N)の配列）
+    # @param now_val: 現在値（(T, N)の配列）
+    # @param dt: 経過時間（長さTもしくは(T, N)の配列）
+    # @param index: 更新する要素（Noneなら全要素）
+    # @return 各ステップの制御量（(T, N)の配列）
+    # @details update()をT回呼んだ場合と同じ結果と内部状態になる．
+    #          indexを指定した場合，Nはindexで選んだ要素数に合わせる．
+    #          出力が前回の出力に依存しないモードは時間方向もベクトル演算で計算し，
+    #          出力制限付きの速度型PIDのみステップごとに計算する
+    def updateSequence(self, target, now_val, dt, index=None):
+        if index is None:
+            index = slice(None)
+        mode = self.__mode[index]
+        size = len(mode)
+        target = np.asarray(target, dtype=float).reshape(-1, size)
+        now_val = np.asarray(now_val, dtype=float).reshape(-1, size)
+        dt = np.asarray(dt, dtype=float)
+        if dt.ndim < 2:
+            dt = dt.reshape(-1, 1)
+        dt = np.broadcast_to(dt, target.shape)
+        steps = len(target)
+        if steps == 0:
+            return np.zeros((0, size))
+
+        mode_list = PID.Mode()
+        need_saturation = self.__need_saturation[index]
+        recursive = (mode == mode_list.sPID) & need_saturation
+        if np.any(recursive):
+            outputs = np.empty_like(target)
+            for k in range(steps):
+                self.update(target[k], now_val[k], dt[k], index)
+                outputs[k] = self.__output[index]
+            return outputs
+
+        # 偏差の系列（先頭2つは前回までの値）
+        prev_diff = self.__diff[:, index]
+        diff = np.empty((steps + 2, size))
+        diff[0] = prev_diff[2]
+        diff[1] = prev_diff[1]
+        diff[2:] = target - now_val
+        e0 = diff[2:]
+        e1 = diff[1:-1]
+        e2 = diff[:-2]
+
+        # 積分はupdate()と同じ順序で足し込む
+        terms = np.empty((steps + 1, size))
+        terms[0] = self.__integral[index]
+        terms[1:] = (e0 + e1) * (dt / 2.0)
+        integral = np.cumsum(terms, axis=0)[1:]
+
+        prev_val = np.empty_like(now_val)
+        prev_val[0] = self.__prev_val[index]
+        prev_val[1:] = now_val[:-1]
+        kp, ki, kd = self.__gain[:, index]
+        prev_output = self.__output[index]
+
+        p_pid = kp * e0 + ki * integral + kd * ((e0 - e1) / dt)
+        increment = kp * (e0 - e1) + ki * e0 * dt + kd * (e0 - 2 * e1 + e2) / dt
+        increment[0] += prev_output
+        s_pid = np.cumsum(increment, axis=0)
+        d_val = -kd * ((now_val - prev_val) / dt)
+        pi_d = kp * e0 + ki * integral + d_val
+        i_pd = -kp * now_val + ki * integral + d_val
+
+        held = np.broadcast_to(prev_output, target.shape)
+        outputs = np.select([mode == mode_list.pPID, mode == mode_list.sPID,
+                             mode == mode_list.PI_D, mode == mode_list.I_PD],
+                            [p_pid, s_pid, pi_d, i_pd], held)
+        output_min, output_max = self.__output_range[:, index]
+        outputs = self.__saturate(outputs, need_saturation, output_min, output_max)
+
+        self.__diff[0, index] = diff[-1]
+        self.__diff[1, index] = diff[-1]
+        self.__diff[2, index] = diff[-2]
+        self.__integral[index] = integral[-1]
+        self.__prev_target[index] = target[-1]
+        self.__prev_val[index] = now_val[-1]
+        self.__output[index] = outputs[-1]
+        return outputs
+
+    # 出力制限
+    # PIDと同じ比較で制限し，符号付きゼロやNaNの扱いもPIDに合わせる
+    @staticmethod
+    def __saturate(output, saturation, output_min, output_max):
+        output = np.where(saturation & (output > output_max), output_max, output)
+        return np.where(saturation & (output < output_min), output_min, output)
+
+    ##
+    # @brief 内部状態（パラメータを含む）の取得
+    # @return PID.state_dtypeの配列（PID.getStates()と同じ形式）
+    def getState(self):
+        state = np.zeros(self.__size, dtype=PID.state_dtype)
+        state['mode'] = self.__mode
+        state['need_saturation'] = self.__need_saturation
+        state['gain'] = self.__gain.T
+        state['output_range'] = self.__output_range.T
+        state['diff'] = self.__diff.T
+        state['prev_val'] = self.__prev_val
+        state['prev_target'] = self.__prev_target
+        state['integral'] = self.__integral
+        state['output'] = self.__output
+        return state
+
+    ##
+    # @brief 内部状態（パラメータを含む）の設定
+    # @param state: PID.state_dtypeの配列
+    # @details 要素数はstateの長さに合わせる
+    def setState(self, state):
+        state = np.asarray(state, dtype=PID.state_dtype)
+        self.__size = len(state)
+        self.__mode = state['mode'].astype(int)
+        self.__need_saturation = state['need_saturation'].astype(bool)
+        self.__gain = np.ascontiguousarray(state['gain'].T, dtype=float)
+        self.__output_range = np.ascontiguousarray(state['output_range'].T, dtype=float)
+        self.__diff = np.ascontiguousarray(state['diff'].T, dtype=float)
+        self.__prev_val = state['prev_val'].astype(float)
+        self.__prev_target = state['prev_target'].astype(float)
+        self.__integral = state['integral'].astype(float)
+        self.__output = state['output'].astype(float)
+
+    ##
+    # @brief 制御量（PIDの計算結果）の取得
+    # @return 制御量（PIDの計算結果）の配列
+    # @attention update()を呼び出さないと値は更新されない
+    def getControlVal(self):
+        return self.__output
@@ -4,3 +4,5 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from .PID import *
+from .PIDBatch import *
+from .PIDAnalysis import *
@@ -3,7 +3,9 @@
 # @file PurePursuitControl.h
 # @brief PurePursuit制御（単純追従制御）
 
+import struct
 from enum import Enum
+import numpy as np
 import MyStdLibPy.Vector.Pose2D as Pose2D
 import MyStdLibPy.Control.FBController.PID as PID
 
@@ -28,6 +30,19 @@ class PurePursuitControl:
             self.fbc_linear = PID()   # < 並進用のフィードバックコントローラ */
             self.fbc_angular = PID()  # < 回転用のフィードバックコントローラ */
 
+    ##
+    # @brief 内部状態のヘッダの形式（リトルエンディアン，36バイト）
+    # @details mode, 経路の点数, 共有フラグ, output.x, output.y, output.theta の順．
+    #          共有フラグは並進用と回転用が同じPIDのオブジェクトの場合に1となる．
+    #          getState()のバイト列はヘッダ，並進用PIDの状態，回転用PIDの状態，
+    #          経路データ（点数 × (x, y, theta) のdouble）の順に並ぶ
+    state_struct = struct.Struct('<iii3d')
+
+    ##
+    # @brief 経路データを除いた内部状態のレコード型（getState()の先頭部分と同じ並び）
+    state_dtype = np.dtype([('mode', '<i4'), ('path_num', '<i4'), ('aliased', '<i4'), ('output', '<f8', (3,)),
+                            ('fbc_linear', PID.state_dtype), ('fbc_angular', PID.state_dtype)])
+
     ##
     # @brief コンストラクタ パラメータと経路データで初期化
     # @param param: パラメータ構造体
@@ -41,7 +56,6 @@ class PurePursuitControl:
     # @brief 経路データの設定
     # @param path: 経路データ
     def setPath(self, path):
-        self.__path.clear()
         self.__path = path
 
     ##
@@ -68,8 +82,10 @@ class PurePursuitControl:
     # @brief 経路データを末尾に追加
     # @param path: 経路データ（Pose2Dのリスト）
     def push_back(self, path):
+        if self.__path is None:
+            self.__path = []
         for i in range(len(path)):
-            self.__path.push_back(path[i])
+            self.__path.append(path[i])
 
     ##
     # @brief 値の更新
@@ -77,8 +93,6 @@ class PurePursuitControl:
     # @param now_val: 現在値
     # @param dt: 前回この関数をコールしてからの経過時間
     def update(self, idx, now_pose, dt):
-        print(self.__path[idx].toString())
-        print(now_pose.toString())
         distance = Pose2D.getDistance(now_pose, self.__path[idx])
         self.__param.fbc_linear.update(0, distance, dt)
         self.__output.x = self.__param.fbc_linear.getControlVal()
@@ -87,6 +101,104 @@ class PurePursuitControl:
         self.__param.fbc_angular.update(0, angle, dt)
         self.__output.theta = self.__param.fbc_angular.getControlVal()
 
+    ##
+    # @brief 内部状態（モード，経路データ，フィードバックコントローラの状態を含む）の取得
+    # @return state_structで始まるバイト列
+    def getState(self):
+        param = self.__param if self.__param is not None else PurePursuitControl.param_t()
+        path = self.__path if self.__path is not None else []
+        points = np.array([[p.x, p.y, p.theta] for p in path], dtype='<f8').reshape(-1, 3)
+        aliased = param.fbc_linear is param.fbc_angular
+        header = PurePursuitControl.state_struct.pack(
+            int(param.mode), len(path), int(aliased), self.__output.x, self.__output.y, self.__output.theta)
+        return header + param.fbc_linear.getState() + param.fbc_angular.getState() + points.tobytes()
+
+    ##
+    # @brief 内部状態（モード，経路データ，フィードバックコントローラの状態を含む）の設定
+    # @param state: getState()で取得したバイト列
+    # @details フィードバックコントローラは現在設定されているものの状態を書き換える
+    def setState(self, state):
+        state = memoryview(state).cast('B')
+        header_size = PurePursuitControl.state_struct.size
+        pid_size = PID.state_struct.size
+        mode, path_num, aliased, x, y, theta = PurePursuitControl.state_struct.unpack(state[:header_size])
+        points = np.frombuffer(state[header_size + 2 * pid_size:], dtype='<f8', count=path_num * 3)
+        self.__restore(mode, bool(aliased), (x, y, theta),
+                       state[header_size:header_size + pid_size],
+                       state[header_size + pid_size:header_size + 2 * pid_size],
+                       points.reshape(-1, 3))
+
+    ##
+    # @brief 複数のPurePursuitControlの内部状態を一括で取得
+    # @param ppcs: PurePursuitControlのリスト
+    # @return (state_dtypeの配列, 全ての経路データを連結した(M, 3)の配列)
+    @staticmethod
+    def getStates(ppcs):
+        header_size = PurePursuitControl.state_dtype.itemsize
+        buf = [ppc.getState() for ppc in ppcs]
+        states = np.frombuffer(b''.join([b[:header_size] for b in buf]),
+                               dtype=PurePursuitControl.state_dtype).copy()
+        path = np.frombuffer(b''.join([b[header_size:] for b in buf]), dtype='<f8').reshape(-1, 3).copy()
+        return states, path
+
+    ##
+    # @brief 複数のPurePursuitControlの内部状態を一括で設定
+    # @param ppcs: PurePursuitControlのリスト
+    # @param states: state_dtypeの配列
+    # @param path: 全ての経路データを連結した(M, 3)の配列
+    @staticmethod
+    def setStates(ppcs, states, path):
+        states = np.ascontiguousarray(states, dtype=PurePursuitControl.state_dtype)
+        path = np.asarray(path, dtype=float).reshape(-1, 3)
+        offsets = np.concatenate(([0], np.cumsum(states['path_num'])))
+        for i, ppc in enumerate(ppcs):
+            ppc.__restore(int(states['mode'][i]), bool(states['aliased'][i]),
+                          tuple(states['output'][i].tolist()),
+                          states['fbc_linear'][i], states['fbc_angular'][i],
+                          path[offsets[i]:offsets[i + 1]])
+
+    ##
+    # @brief 複数のPurePursuitControlの内部状態をファイルに保存
+    # @param file: ファイル名もしくはファイルオブジェクト
+    # @param ppcs: PurePursuitControlのリスト
+    @staticmethod
+    def saveStates(file, ppcs):
+        states, path = PurePursuitControl.getStates(ppcs)
+        np.savez(file, state=states, path=path)
+
+    ##
+    # @brief 複数のPurePursuitControlの内部状態をファイルから復元
+    # @param file: ファイル名もしくはファイルオブジェクト
+    # @param ppcs: 復元先のPurePursuitControlのリスト（Noneなら新しく生成）
+    # @return 復元したPurePursuitControlのリスト
+    @staticmethod
+    def loadStates(file, ppcs=None):
+        with np.load(file, allow_pickle=False) as data:
+            states = data['state']
+            path = data['path']
+        if ppcs is None:
+            ppcs = [PurePursuitControl(PurePursuitControl.param_t(), []) for _ in range(len(states))]
+        PurePursuitControl.setStates(ppcs, states, path)
+        return ppcs
+
+    # 内部状態の復元
+    # aliasedなら1つのPIDを並進用と回転用の両方に設定し，そうでなければ別々のPIDにする
+    def __restore(self, mode, aliased, output, fbc_linear, fbc_angular, points):
+        param = PurePursuitControl.param_t()
+        if self.__param is not None:
+            param.fbc_linear = self.__param.fbc_linear
+            param.fbc_angular = self.__param.fbc_angular
+        if aliased:
+            param.fbc_angular = param.fbc_linear
+        elif param.fbc_angular is param.fbc_linear:
+            param.fbc_angular = PID()
+        param.mode = mode
+        param.fbc_linear.setState(fbc_linear)
+        param.fbc_angular.setState(fbc_angular)
+        self.__param = param
+        self.__path = [Pose2D(x, y, theta) for x, y, theta in points.tolist()]
+        self.__output = Pose2D(*output)
+
     ##
     # @brief 制御量（計算結果）の取得
     # @return 制御量（計算結果）
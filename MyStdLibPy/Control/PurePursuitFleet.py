@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+##
+# @file PurePursuitFleet.py
+# @brief 複数ロボットのPurePursuit制御の一括計算
+
+import numpy as np
+import MyStdLibPy.Vector.Pose2D as Pose2D
+import MyStdLibPy.Control.FBController.PID as PID
+import MyStdLibPy.Control.FBController.PIDBatch as PIDBatch
+import MyStdLibPy.Control.PurePursuitControl as PurePursuitControl
+
+
+##
+# @class PurePursuitFleet
+# @brief 複数ロボットのPurePursuit制御の一括計算
+# @details 全ロボットの経路を1つの(M, 3)配列に連結して保持し（ragged array），
+#          各ロボットの経路は先頭位置と点数で表す．経路の追加は配列の空き領域に書き込み，
+#          削除は領域を未使用にするだけなので，容量が足りない場合を除き配列は再確保しない．
+#          update()では全ロボットの注視点探索と並進・回転のフィードバック制御をベクトル演算で一度に行う．
+#          ロボットはaddPath()が返すスロット番号で識別し，入出力の配列の行はスロット番号に対応する．
+
+class PurePursuitFleet:
+    ##
+    # @brief パラメータ構造体
+    class param_t:
+        def __init__(self):
+            self.mode = PurePursuitControl.Mode().diff  # < モード
+            self.lookahead = 1.0                       # < 注視距離
+            self.fbc_linear = PID.param_t()            # < 並進用のフィードバックコントローラのパラメータ
+            self.fbc_angular = PID.param_t()           # < 回転用のフィードバックコントローラのパラメータ
+
+    ##
+    # @brief コンストラクタ
+    # @param param: パラメータ構造体
+    # @param capacity: 経路の点数の初期容量
+    def __init__(self, param=None, capacity=1024):
+        self.__param = param if param is not None else PurePursuitFleet.param_t()
+        self.__data = np.zeros((max(capacity, 1), 3))
+        self.__owner = np.full(max(capacity, 1), -1, dtype=int)
+        self.__tail = 0  # 使用済み領域の末尾
+        self.__start = np.zeros(0, dtype=int)
+        self.__length = np.zeros(0, dtype=int)
+        self.__index = np.zeros(0, dtype=int)  # 追従中の経路の点（経路内の番号）
+        self.__active = np.zeros(0, dtype=bool)
+        self.__output = np.zeros((0, 3))
+        self.__fbc_linear = PIDBatch()
+        self.__fbc_angular = PIDBatch()
+
+    ##
+    # @brief パラメータの設定
+    # @param param: パラメータ構造体
+    # @attention フィードバックコントローラのパラメータは以降に追加する経路から適用される
+    def setParam(self, param):
+        self.__param = param
+
+    ##
+    # @brief 経路の追加
+    # @param path: 経路データ（Pose2Dのリストもしくは(K, 3)の配列）
+    # @param fbc_linear: 並進用のフィードバックコントローラのパラメータ（Noneならparam_tの値）
+    # @param fbc_angular: 回転用のフィードバックコントローラのパラメータ（Noneならparam_tの値）
+    # @return スロット番号
+    def addPath(self, path, fbc_linear=None, fbc_angular=None):
+        points = self.__toArray(path)
+        n = len(points)
+        if self.__tail + n > len(self.__data):
+            self.__reserve(n)
+
+        free = np.flatnonzero(~self.__active)
+        if len(free) > 0:
+            slot = int(free[0])
+        else:
+            slot = self.getSlotNum()
+            self.__resize(slot + 1)
+
+        start = self.__tail
+        self.__data[start:start + n] = points
+        self.__owner[start:start + n] = slot
+        self.__tail += n
+        self.__start[slot] = start
+        self.__length[slot] = n
+        self.__index[slot] = 0
+        self.__active[slot] = True
+        self.__output[slot] = 0
+
+        self.__fbc_linear.setParam(fbc_linear if fbc_linear is not None else self.__param.fbc_linear, slot)
+        self.__fbc_angular.setParam(fbc_angular if fbc_angular is not None else self.__param.fbc_angular, slot)
+        self.__fbc_linear.reset(slot)
+        self.__fbc_angular.reset(slot)
+        return slot
+
+    ##
+    # @brief 経路の削除
+    # @param slot: スロット番号
+    # @details 経路の領域は未使用になり，次に容量が足りなくなったときに詰められる
+    def retirePath(self, slot):
+        if not self.__active[slot]:
+            return
+        start = self.__start[slot]
+        self.__owner[start:start + self.__length[slot]] = -1
+        self.__active[slot] = False
+        self.__length[slot] = 0
+        self.__output[slot] = 0
+
+    ##
+    # @brief スロット数（入出力の配列の行数）の取得
+    def getSlotNum(self):
+        return len(self.__active)
+
+    ##
+    # @brief スロットが使用中の場合にtrueを返す
+    # @param slot: スロット番号
+    def isActive(self, slot):
+        return bool(self.__active[slot])
+
+    ##
+    # @brief 経路データの取得
+    # @param slot: スロット番号
+    # @return 経路データ（(K, 3)の配列のビュー）
+    def getPath(self, slot):
+        start = self.__start[slot]
+        return self.__data[start:start + self.__length[slot]]
+
+    ##
+    # @brief 追従中の経路の点の番号の取得
+    # @return 経路内の番号の配列
+    def getIndex(self):
+        return self.__index
+
+    ##
+    # @brief 値の更新
+    # @param now_pose: 現在値（(スロット数, 3)の配列，各行はx, y, theta）
+    # @param dt: 前回この関数をコールしてからの経過時間
+    # @param index: 追従する経路の点の番号（長さスロット数の配列，Noneなら注視点を探索）
+    # @details indexはPurePursuitControl.update()のidxと同じく負の値なら経路の末尾から数える
+    # @attention 点数0の経路のスロットは更新しない．経路の範囲外の番号を指定するとIndexErrorを送出する
+    def update(self, now_pose, dt, index=None):
+        slots = np.flatnonzero(self.__active & (self.__length > 0))
+        if len(slots) == 0:
+            return
+        now_pose = np.asarray(now_pose, dtype=float)
+        if index is None:
+            target = self.__lookahead(now_pose)[slots]
+        else:
+            self.__index = self.__normalizeIndex(index, slots)
+            target = (self.__start + self.__index)[slots]
+        pose = now_pose[slots]
+
+        dx = self.__data[target, 0] - pose[:, 0]
+        dy = self.__data[target, 1] - pose[:, 1]
+        distance = np.sqrt(dx ** 2 + dy ** 2)
+        self.__fbc_linear.update(0, distance, dt, slots)
+        self.__output[slots, 0] = self.__fbc_linear.getControlVal()[slots]
+
+        angle = np.arctan2(dy, dx) - pose[:, 2]
+        self.__fbc_angular.update(0, angle, dt, slots)
+        self.__output[slots, 2] = self.__fbc_angular.getControlVal()[slots]
+
+    ##
+    # @brief 複数ステップ分の値の一括更新
+    # @param now_pose: 現在値（(T, スロット数, 3)の配列）
+    # @param dt: 経過時間（長さTもしくは(T, スロット数)の配列）
+    # @param index: 追従する経路の点の番号（(T, スロット数)の配列）
+    # @return 各ステップの制御量（(T, スロット数, 3)の配列）
+    # @details indexを指定してupdate()をT回呼んだ場合と同じ結果と内部状態になる．
+    #          全ステップの注視点までの距離と角度をまとめて求め，PIDBatch.updateSequence()に渡す．
+    #          注視点の探索は前回の探索結果に依存するため，indexの指定は必須
+    # @attention 経路の範囲外の番号を指定するとIndexErrorを送出する
+    def updateSequence(self, now_pose, dt, index):
+        now_pose = np.asarray(now_pose, dtype=float).reshape(-1, self.getSlotNum(), 3)
+        steps = len(now_pose)
+        slots = np.flatnonzero(self.__active & (self.__length > 0))
+        index = self.__normalizeIndex(np.reshape(index, (steps, self.getSlotNum())), slots)
+        outputs = np.empty((steps,) + self.__output.shape)
+        outputs[:] = self.__output
+        if steps == 0 or len(slots) == 0:
+            return outputs
+        dt = np.asarray(dt, dtype=float)
+        if dt.ndim < 2:
+            dt = dt.reshape(-1, 1)
+        dt = np.broadcast_to(dt, index.shape)[:, slots]
+
+        target = self.__start[slots] + index[:, slots]
+        pose = now_pose[:, slots]
+        dx = self.__data[target, 0] - pose[..., 0]
+        dy = self.__data[target, 1] - pose[..., 1]
+        distance = np.sqrt(dx ** 2 + dy ** 2)
+        zero = np.zeros_like(distance)
+        outputs[:, slots, 0] = self.__fbc_linear.updateSequence(zero, distance, dt, slots)
+
+        angle = np.arctan2(dy, dx) - pose[..., 2]
+        outputs[:, slots, 2] = self.__fbc_angular.updateSequence(zero, angle, dt, slots)
+
+        self.__index = index[-1]
+        self.__output[:] = outputs[-1]
+        return outputs
+
+    ##
+    # @brief 制御量（計算結果）の取得
+    # @param slot: スロット番号（Noneなら全スロット）
+    # @return slotを指定した場合はPose2D，Noneの場合は(スロット数, 3)の配列
+    # @attention update()を呼び出さないと値は更新されない
+    def getControlVal(self, slot=None):
+        if slot is None:
+            return self.__output
+        return Pose2D(*self.__output[slot].tolist())
+
+    # 全ロボットの注視点を探索し，追従中の点を更新する
+    # 追従中の点以降で現在値から注視距離以上離れた最初の点を選び，無ければ経路の終点を選ぶ
+    # @return 注視点の連結配列上の添字（スロットごと）
+    def __lookahead(self, now_pose):
+        tail = self.__tail
+        owner = self.__owner[:tail]
+        used = owner >= 0
+        rows = owner[used]
+        points = np.flatnonzero(used)
+
+        d = self.__data[points, :2] - now_pose[rows, :2]
+        local = points - self.__start[rows]
+        candidate = (local >= self.__index[rows]) & \
+            (d[:, 0] ** 2 + d[:, 1] ** 2 >= self.__param.lookahead ** 2)
+
+        index = np.maximum(self.__length - 1, 0)
+        found = points[candidate]
+        slots, first = np.unique(owner[found], return_index=True)
+        index[slots] = found[first] - self.__start[slots]
+        self.__index = np.where(self.__active, index, 0)
+        return self.__start + self.__index
+
+    # 追従する経路の点の番号を経路内の0以上の番号に直す
+    # 負の番号は経路の末尾から数え，slotsのいずれかで範囲外ならIndexErrorを送出する
+    def __normalizeIndex(self, index, slots):
+        index = np.asarray(index, dtype=int)
+        index = np.where(index < 0, index + self.__length, index)
+        if np.any((index[..., slots] < 0) | (index[..., slots] >= self.__length[slots])):
+            raise IndexError('path index out of range')
+        return np.where(self.__active, index, 0)
+
+    # 経路の点をn点追加できるように領域を確保する
+    # 未使用の領域が多ければ詰め，足りなければ容量を倍にする
+    def __reserve(self, n):
+        used = np.flatnonzero(self.__owner[:self.__tail] >= 0)
+        size = len(used) + n
+        capacity = len(self.__data)
+        while capacity < size:
+            capacity *= 2
+        if capacity == len(self.__data):
+            data = self.__data
+            owner = self.__owner
+        else:
+            data = np.zeros((capacity, 3))
+            owner = np.full(capacity, -1, dtype=int)
+
+        # 経路の順序を保ったまま前に詰める
+        rows = self.__owner[used]
+        moved = self.__data[used]
+        new_start = np.zeros_like(self.__start)
+        first = np.ones(len(used), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        new_start[rows[first]] = np.flatnonzero(first)
+
+        owner[:] = -1
+        owner[:len(used)] = rows
+        data[:len(used)] = moved
+        self.__data = data
+        self.__owner = owner
+        self.__start = np.where(self.__active, new_start, 0)
+        self.__tail = len(used)
+
+    # スロット数の変更
+    def __resize(self, size):
+        old = self.getSlotNum()
+
+        def fit(a):
+            b = np.zeros((size,) + a.shape[1:], dtype=a.dtype)
+            b[:old] = a
+            return b
+
+        self.__start = fit(self.__start)
+        self.__length = fit(self.__length)
+        self.__index = fit(self.__index)
+        self.__active = fit(self.__active)
+        self.__output = fit(self.__output)
+        self.__fbc_linear.resize(size)
+        self.__fbc_angular.resize(size)
+
+    # 経路データを(K, 3)の配列に変換
+    @staticmethod
+    def __toArray(path):
+        if isinstance(path, np.ndarray):
+            return np.asarray(path, dtype=float).reshape(-1, 3)
+        return np.array([[p.x, p.y, p.theta] for p in path], dtype=float).reshape(-1, 3)
@@ -5,3 +5,4 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from .FBController import *
 from .PurePursuitControl import *
+from .PurePursuitFleet import *
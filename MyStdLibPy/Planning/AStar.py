@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+##
+# @file AStar.py
+# @brief コストマップ上のA*/Hybrid A*による経路計画
+
+import heapq
+import math
+import numpy as np
+import MyStdLibPy.Vector.Pose2D as Pose2D
+
+##
+# @class AStar
+# @brief コストマップ上のA*/Hybrid A*による経路計画
+# @details 計画結果はPose2Dのリストで返すため，そのままPurePursuitControl.setPath()に渡せる．
+#          オープンリストは二分ヒープで，decrease-keyの代わりに重複挿入と取り出し時の読み飛ばしで扱う．
+#          クローズドリストはノード番号で引くフラット配列（bytearray）で保持する．
+
+class AStar:
+    ##
+    # @brief モードリスト
+    class Mode:
+        def __init__(self):
+            self.grid = 0    # < 8近傍（4近傍）のグリッドA*
+            self.hybrid = 1  # < 車両の運動を考慮したHybrid A*
+
+    ##
+    # @brief パラメータ構造体
+    class param_t:
+        def __init__(self):
+            self.mode = AStar.Mode().grid  # < モード
+            self.allow_diagonal = True     # < 斜め移動を許可するか（gridモード）
+            self.heuristic_weight = 1.0    # < ヒューリスティックの重み（1より大きいと非最適だが高速）
+            self.heading_num = 16          # < 角度の分割数（hybridモード）
+            self.step = 1.5                # < 1回の展開で進む弧長[m]（hybridモード）
+            self.steer_num = 1             # < 片側の操舵パターン数（1パターンで角度1分割分曲がる）（hybridモード）
+            self.steer_penalty = 0.1       # < 操舵時の追加コスト係数（hybridモード）
+            self.allow_reverse = False     # < 後退を許可するか（hybridモード）
+            self.reverse_penalty = 2.0     # < 後退時のコスト倍率（hybridモード）
+            self.goal_tolerance = None     # < ゴール判定距離[m]，Noneなら1セル分（hybridモード）
+
+    ##
+    # @brief コンストラクタ
+    # @param param: パラメータ構造体
+    # @param grid_map: コストマップ（GridMap）
+    def __init__(self, param=None, grid_map=None):
+        self.__param = param if param is not None else AStar.param_t()
+        self.__map = grid_map
+        self.__path = []
+        self.__motions = None
+        self.__primitives = None
+
+    ##
+    # @brief パラメータの設定
+    # @param param: パラメータ構造体
+    def setParam(self, param):
+        self.__param = param
+        self.__motions = None
+        self.__primitives = None
+
+    ##
+    # @brief モードの設定
+    # @param mode: モードリスト
+    def setMode(self, mode):
+        self.__param.mode = mode
+
+    ##
+    # @brief コストマップの設定
+    # @param grid_map: コストマップ（GridMap）
+    def setMap(self, grid_map):
+        self.__map = grid_map
+        self.__motions = None
+        self.__primitives = None
+
+    ##
+    # @brief 経路の計画
+    # @param start: 始点（Pose2D）
+    # @param goal: 終点（Pose2D）
+    # @return 経路データ（Pose2Dのリスト），経路が見つからない場合は空のリスト
+    def plan(self, start, goal):
+        if self.__param.mode == AStar.Mode().hybrid:
+            self.__path = self.__planHybrid(start, goal)
+        else:
+            self.__path = self.__planGrid(start, goal)
+        return self.__path
+
+    ##
+    # @brief 直前に計画した経路の取得
+    # @return 経路データ（Pose2Dのリスト）
+    def getPath(self):
+        return self.__path
+
+    # 8近傍（4近傍）の移動量を事前計算
+    # (フラット配列上の移動量, 移動距離, 角を通過する際に確認するセル2つ)
+    def __makeMotions(self):
+        stride = self.__map.getStride()
+        motions = [(1, 1.0, 0, 0), (-1, 1.0, 0, 0),
+                   (stride, 1.0, 0, 0), (-stride, 1.0, 0, 0)]
+        if self.__param.allow_diagonal:
+            for dx in (-1, 1):
+                for dy in (-1, 1):
+                    motions.append((dx + dy * stride, math.sqrt(2.0), dx, dy * stride))
+        self.__motions = (self.__motionKey(), motions)
+
+    # 移動量の再計算が必要か判定するためのキー
+    def __motionKey(self):
+        return (self.__map.getStride(), self.__param.allow_diagonal)
+
+    # グリッドA*
+    def __planGrid(self, start, goal):
+        grid_map = self.__map
+        if self.__motions is None or self.__motions[0] != self.__motionKey():
+            self.__makeMotions()
+        motions = self.__motions[1]
+        stride = grid_map.getStride()
+        cost = grid_map.getFlatCost()
+
+        sx, sy = grid_map.toIndex(start)
+        gx, gy = grid_map.toIndex(goal)
+        if grid_map.isObstacle(sx, sy) or grid_map.isObstacle(gx, gy):
+            return []
+        s = grid_map.toFlatIndex(sx, sy)
+        t = grid_map.toFlatIndex(gx, gy)
+
+        inf = float('inf')
+        n = len(cost)
+        g = [inf] * n
+        parent = [-1] * n
+        closed = bytearray(n)
+        w = self.__param.heuristic_weight
+        diagonal = self.__param.allow_diagonal
+        diag_extra = math.sqrt(2.0) - 2.0
+
+        def heuristic(idx):
+            dy, dx = divmod(idx, stride)
+            dx = abs(dx - gx - 1)
+            dy = abs(dy - gy - 1)
+            if diagonal:
+                return w * (dx + dy + diag_extra * min(dx, dy))
+            return w * (dx + dy)
+
+        g[s] = 0.0
+        heap = [(heuristic(s), s)]
+        while heap:
+            _, u = heapq.heappop(heap)
+            if closed[u]:
+                continue
+            closed[u] = 1
+            if u == t:
+                break
+            gu = g[u]
+            for offset, dist, cx, cy in motions:
+                v = u + offset
+                if closed[v] or cost[v] == inf:
+                    continue
+                if cx and (cost[u + cx] == inf or cost[u + cy] == inf):
+                    continue
+                gv = gu + dist * (1.0 + cost[v])
+                if gv < g[v]:
+                    g[v] = gv
+                    parent[v] = u
+                    heapq.heappush(heap, (gv + heuristic(v), v))
+
+        if not closed[t]:
+            return []
+
+        cells = [t]
+        while cells[-1] != s:
+            cells.append(parent[cells[-1]])
+        cells.reverse()
+
+        path = [Pose2D(start.x, start.y, start.theta)]
+        for idx in cells[1:-1]:
+            ix, iy = grid_map.fromFlatIndex(idx)
+            path.append(grid_map.toPose(ix, iy))
+        path.append(Pose2D(goal.x, goal.y, goal.theta))
+        for i in range(1, len(path) - 1):
+            path[i].theta = Pose2D.getAngle(path[i], path[i + 1])
+        return path
+
+    # Hybrid A*の運動プリミティブを角度ごとに事前計算
+    # (x移動量, y移動量, 移動後の角度番号, 弧長, 衝突判定用の途中点のリスト)
+    # 移動量はセル単位
+    def __makePrimitives(self):
+        param = self.__param
+        n = param.heading_num
+        bin_width = 2.0 * np.pi / n
+        length = param.step / self.__map.resolution
+        sample_num = max(2, int(np.ceil(2.0 * length)))
+
+        local = []
+        directions = (1.0, -1.0) if param.allow_reverse else (1.0,)
+        for direction in directions:
+            for j in range(-param.steer_num, param.steer_num + 1):
+                kappa = j * bin_width / length
+                weight = 1.0 + param.steer_penalty * abs(j)
+                if direction < 0:
+                    weight *= param.reverse_penalty
+                points = []
+                for k in range(1, sample_num + 1):
+                    s = direction * length * k / sample_num
+                    if j == 0:
+                        points.append((s, 0.0))
+                    else:
+                        points.append((np.sin(kappa * s) / kappa,
+                                       (1.0 - np.cos(kappa * s)) / kappa))
+                local.append((points, int(direction) * j, weight))
+
+        primitives = []
+        for i in range(n):
+            c = np.cos(i * bin_width)
+            s = np.sin(i * bin_width)
+            motions = []
+            for points, dh, weight in local:
+                samples = [(float(c * px - s * py), float(s * px + c * py)) for px, py in points]
+                dx, dy = samples[-1]
+                motions.append((dx, dy, (i + dh) % n, length * weight / sample_num, samples))
+            primitives.append(motions)
+        self.__primitives = (self.__primitiveKey(), primitives)
+
+    # 運動プリミティブの再計算が必要か判定するためのキー
+    def __primitiveKey(self):
+        param = self.__param
+        return (param.heading_num, param.step, param.steer_num, param.steer_penalty,
+                param.allow_reverse, param.reverse_penalty, self.__map.resolution)
+
+    # Hybrid A*
+    def __planHybrid(self, start, goal):
+        grid_map = self.__map
+        param = self.__param
+        if self.__primitives is None or self.__primitives[0] != self.__primitiveKey():
+            self.__makePrimitives()
+        primitives = self.__primitives[1]
+
+        n = param.heading_num
+        bin_width = 2.0 * np.pi / n
+        res = grid_map.resolution
+        width = grid_map.getWidth()
+        height = grid_map.getHeight()
+        stride = grid_map.getStride()
+        cost = grid_map.getFlatCost()
+        inf = float('inf')
+        w = param.heuristic_weight
+        tolerance = (param.goal_tolerance if param.goal_tolerance is not None else res) / res
+
+        x0 = (start.x - grid_map.origin.x) / res
+        y0 = (start.y - grid_map.origin.y) / res
+        gx = (goal.x - grid_map.origin.x) / res
+        gy = (goal.y - grid_map.origin.y) / res
+        if (grid_map.isObstacle(int(np.floor(x0)), int(np.floor(y0)))
+                or grid_map.isObstacle(int(np.floor(gx)), int(np.floor(gy)))):
+            return []
+        h0 = int(round(start.theta / bin_width)) % n
+
+        # ノード番号は(セルのフラット添字, 角度番号)を1つの整数にまとめたもの
+        closed = bytearray(len(cost) * n)
+        best = {}
+        nodes = {}
+        start_node = (int(y0) + 1) * stride * n + (int(x0) + 1) * n + h0
+        best[start_node] = 0.0
+        nodes[start_node] = (x0, y0, h0, -1)
+        heap = [(w * math.hypot(gx - x0, gy - y0), 0.0, start_node)]
+        found = -1
+        while heap:
+            _, gu, u = heapq.heappop(heap)
+            if closed[u] or gu > best[u]:
+                continue
+            closed[u] = 1
+            x, y, h, _ = nodes[u]
+            if math.hypot(gx - x, gy - y) <= tolerance:
+                found = u
+                break
+            for dx, dy, hv, seg, samples in primitives[h]:
+                gv = gu
+                for px, py in samples:
+                    qx = x + px
+                    qy = y + py
+                    if not (0.0 <= qx < width and 0.0 <= qy < height):
+                        gv = inf
+                        break
+                    gv += seg * (1.0 + cost[(int(qy) + 1) * stride + int(qx) + 1])
+                    if gv == inf:
+                        break
+                if gv == inf:
+                    continue
+                xv = x + dx
+                yv = y + dy
+                v = ((int(yv) + 1) * stride + int(xv) + 1) * n + hv
+                if closed[v] or gv >= best.get(v, inf):
+                    continue
+                best[v] = gv
+                nodes[v] = (xv, yv, hv, u)
+                heapq.heappush(heap, (gv + w * math.hypot(gx - xv, gy - yv), gv, v))
+
+        if found < 0:
+            return []
+
+        states = []
+        u = found
+        while u >= 0:
+            x, y, h, u = nodes[u]
+            states.append((x, y, h))
+        states.reverse()
+
+        path = [Pose2D(start.x, start.y, start.theta)]
+        for x, y, h in states[1:]:
+            path.append(Pose2D(grid_map.origin.x + x * res, grid_map.origin.y + y * res,
+                               h * bin_width))
+        path.append(Pose2D(goal.x, goal.y, goal.theta))
+        return path
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+##
+# @file DStarLite.py
+# @brief コストマップ上のD* Liteによる逐次再計画
+
+import heapq
+import math
+import MyStdLibPy.Vector.Pose2D as Pose2D
+
+##
+# @class DStarLite
+# @brief コストマップ上のD* Liteによる逐次再計画
+# @details ゴールから始点へ向かって探索し，探索結果を保持しておくことで
+#          マップの一部が変化した場合や始点が移動した場合に影響のある範囲だけを再計算する．
+#          計画結果はPose2Dのリストで返すため，そのままPurePursuitControl.setPath()に渡せる．
+
+class DStarLite:
+    ##
+    # @brief パラメータ構造体
+    class param_t:
+        def __init__(self):
+            self.allow_diagonal = True  # < 斜め移動を許可するか
+
+    ##
+    # @brief コンストラクタ
+    # @param param: パラメータ構造体
+    # @param grid_map: コストマップ（GridMap）
+    def __init__(self, param=None, grid_map=None):
+        self.__param = param if param is not None else DStarLite.param_t()
+        self.__map = grid_map
+        self.__path = []
+        self.reset()
+
+    ##
+    # @brief リセット（次回のplan()で最初から探索し直す）
+    def reset(self):
+        self.__goal = -1
+        self.__start = -1
+        self.__km = 0.0
+        self.__g = []
+        self.__rhs = []
+        self.__heap = []
+
+    ##
+    # @brief パラメータの設定
+    # @param param: パラメータ構造体
+    def setParam(self, param):
+        self.__param = param
+        self.reset()
+
+    ##
+    # @brief コストマップの設定
+    # @param grid_map: コストマップ（GridMap）
+    def setMap(self, grid_map):
+        self.__map = grid_map
+        self.reset()
+
+    ##
+    # @brief 1セルのコストを変更し，影響のあるノードを更新
+    # @param ix: x方向のセル番号
+    # @param iy: y方向のセル番号
+    # @param cost: コスト
+    # @attention 探索結果を保持したままマップを変更する場合はGridMap.setCost()ではなくこちらを使う
+    #            マップ外のセルを指定するとIndexErrorを送出する
+    def updateCell(self, ix, iy, cost):
+        self.__map.setCost(ix, iy, cost)
+        if self.__goal < 0:
+            return
+        u = self.__map.toFlatIndex(ix, iy)
+        self.__updateVertex(u)
+        for offset, _ in self.__motions:
+            self.__updateVertex(u + offset)
+
+    ##
+    # @brief 経路の計画
+    # @param start: 始点（Pose2D）
+    # @param goal: 終点（Pose2D）
+    # @return 経路データ（Pose2Dのリスト），経路が見つからない場合は空のリスト
+    # @details 前回とゴールが同じ場合は前回の探索結果を再利用する
+    def plan(self, start, goal):
+        grid_map = self.__map
+        sx, sy = grid_map.toIndex(start)
+        gx, gy = grid_map.toIndex(goal)
+        if grid_map.isObstacle(sx, sy) or grid_map.isObstacle(gx, gy):
+            self.__path = []
+            return self.__path
+
+        s = grid_map.toFlatIndex(sx, sy)
+        t = grid_map.toFlatIndex(gx, gy)
+        if t != self.__goal or len(self.__g) != len(grid_map.getFlatCost()):
+            self.__initialize(s, t)
+        elif s != self.__start:
+            self.__km += self.__heuristic(self.__start, s)
+            self.__start = s
+
+        self.__computeShortestPath()
+        self.__path = self.__extractPath(start, goal)
+        return self.__path
+
+    ##
+    # @brief 直前に計画した経路の取得
+    # @return 経路データ（Pose2Dのリスト）
+    def getPath(self):
+        return self.__path
+
+    # 探索の初期化
+    def __initialize(self, s, t):
+        stride = self.__map.getStride()
+        motions = [(1, 1.0), (-1, 1.0), (stride, 1.0), (-stride, 1.0)]
+        if self.__param.allow_diagonal:
+            for dx in (-1, 1):
+                for dy in (-1, 1):
+                    motions.append((dx + dy * stride, math.sqrt(2.0)))
+        self.__motions = motions
+        self.__stride = stride
+
+        n = len(self.__map.getFlatCost())
+        inf = float('inf')
+        self.__g = [inf] * n
+        self.__rhs = [inf] * n
+        self.__km = 0.0
+        self.__start = s
+        self.__goal = t
+        self.__rhs[t] = 0.0
+        self.__heap = [(self.__calculateKey(t), t)]
+
+    # 2ノード間のヒューリスティック（セル単位の8近傍距離もしくはマンハッタン距離）
+    def __heuristic(self, a, b):
+        ay, ax = divmod(a, self.__stride)
+        by, bx = divmod(b, self.__stride)
+        dx = abs(ax - bx)
+        dy = abs(ay - by)
+        if self.__param.allow_diagonal:
+            return dx + dy + (math.sqrt(2.0) - 2.0) * min(dx, dy)
+        return dx + dy
+
+    def __calculateKey(self, u):
+        m = min(self.__g[u], self.__rhs[u])
+        return (m + self.__heuristic(self.__start, u) + self.__km, m)
+
+    # uからvへの移動コスト
+    # 斜め移動の場合は角を挟む2セルのどちらかが障害物なら通れない
+    def __edgeCost(self, u, v, dist):
+        cost = self.__map.getFlatCost()
+        inf = float('inf')
+        if cost[u] == inf or cost[v] == inf:
+            return inf
+        if dist > 1.0:
+            cy, cx = divmod(v - u + self.__stride + 1, self.__stride)
+            if cost[u + cx - 1] == inf or cost[u + (cy - 1) * self.__stride] == inf:
+                return inf
+        return dist * (1.0 + cost[v])
+
+    def __updateVertex(self, u):
+        n = len(self.__g)
+        if u < 0 or u >= n:
+            return
+        g = self.__g
+        rhs = self.__rhs
+        if u != self.__goal:
+            best = float('inf')
+            for offset, dist in self.__motions:
+                v = u + offset
+                if 0 <= v < n and g[v] < best:
+                    c = self.__edgeCost(u, v, dist) + g[v]
+                    if c < best:
+                        best = c
+            rhs[u] = best
+        if g[u] != rhs[u]:
+            heapq.heappush(self.__heap, (self.__calculateKey(u), u))
+
+    def __computeShortestPath(self):
+        heap = self.__heap
+        g = self.__g
+        rhs = self.__rhs
+        s = self.__start
+        n = len(g)
+        while heap:
+            k_old, u = heap[0]
+            if k_old >= self.__calculateKey(s) and rhs[s] == g[s]:
+                break
+            heapq.heappop(heap)
+            # 既に整合しているノードの古いエントリは読み飛ばす
+            if g[u] == rhs[u]:
+                continue
+            k_new = self.__calculateKey(u)
+            if k_old < k_new:
+                heapq.heappush(heap, (k_new, u))
+                continue
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+                # gが下がった場合はuを経由する方が安くなるノードだけ更新すればよい
+                for offset, dist in self.__motions:
+                    v = u - offset
+                    if 0 <= v < n and v != self.__goal:
+                        c = self.__edgeCost(v, u, dist) + g[u]
+                        if c < rhs[v]:
+                            rhs[v] = c
+                            if g[v] != c:
+                                heapq.heappush(heap, (self.__calculateKey(v), v))
+            else:
+                g[u] = float('inf')
+                self.__updateVertex(u)
+                for offset, _ in self.__motions:
+                    self.__updateVertex(u - offset)
+
+    def __extractPath(self, start, goal):
+        grid_map = self.__map
+        g = self.__g
+        u = self.__start
+        if g[u] == float('inf'):
+            return []
+
+        path = [Pose2D(start.x, start.y, start.theta)]
+        limit = len(g)
+        while u != self.__goal and limit > 0:
+            best = float('inf')
+            nxt = -1
+            for offset, dist in self.__motions:
+                v = u + offset
+                c = self.__edgeCost(u, v, dist) + g[v]
+                if c < best:
+                    best = c
+                    nxt = v
+            if nxt < 0:
+                return []
+            u = nxt
+            limit -= 1
+            if u != self.__goal:
+                ix, iy = grid_map.fromFlatIndex(u)
+                path.append(grid_map.toPose(ix, iy))
+        path.append(Pose2D(goal.x, goal.y, goal.theta))
+        for i in range(1, len(path) - 1):
+            path[i].theta = Pose2D.getAngle(path[i], path[i + 1])
+        return path
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+##
+# @file GridMap.py
+# @brief 経路計画用の2次元コストマップ
+
+import numpy as np
+import MyStdLibPy.Vector.Pose2D as Pose2D
+
+##
+# @class GridMap
+# @brief 経路計画用の2次元コストマップ
+# @details セル(ix, iy)のコストはcost[iy, ix]で表す．
+#          コストがobstacle_cost以上もしくは非有限のセルは障害物として扱う．
+#          探索器向けに，外周を障害物で1セル分囲った1次元配列（フラット配列）を保持する．
+
+
+class GridMap:
+    ##
+    # @brief コンストラクタ
+    # @param cost: コストの2次元配列（行がy，列がx）
+    # @param resolution: 1セルの大きさ[m]
+    # @param origin: セル(0, 0)の左下隅のワールド座標（Pose2D）
+    # @param obstacle_cost: 障害物とみなすコストの閾値
+    def __init__(self, cost=None, resolution=1.0, origin=None, obstacle_cost=np.inf):
+        if cost is None:
+            cost = np.zeros((1, 1))
+        self.resolution = resolution  # < 1セルの大きさ[m]
+        self.origin = origin if origin is not None else Pose2D()  # < セル(0, 0)の左下隅の座標
+        self.obstacle_cost = obstacle_cost  # < 障害物とみなすコストの閾値
+        self.setCostMap(cost)
+
+    ##
+    # @brief コストマップ全体の設定
+    # @param cost: コストの2次元配列（行がy，列がx）
+    def setCostMap(self, cost):
+        self.__cost = np.array(cost, dtype=float)
+        self.__height, self.__width = self.__cost.shape
+        self.__stride = self.__width + 2
+        flat = np.full((self.__height + 2, self.__stride), np.inf)
+        flat[1:-1, 1:-1] = self.__cost
+        flat[~np.isfinite(flat) | (flat >= self.obstacle_cost)] = np.inf
+        self.__flat = flat.ravel().tolist()
+
+    ##
+    # @brief 1セルのコストの設定
+    # @param ix: x方向のセル番号
+    # @param iy: y方向のセル番号
+    # @param cost: コスト
+    # @attention マップ外のセルを指定するとIndexErrorを送出する
+    def setCost(self, ix, iy, cost):
+        if not self.isInside(ix, iy):
+            raise IndexError('cell (%d, %d) is outside the map' % (ix, iy))
+        self.__cost[iy, ix] = cost
+        if not np.isfinite(cost) or cost >= self.obstacle_cost:
+            cost = np.inf
+        self.__flat[self.toFlatIndex(ix, iy)] = float(cost)
+
+    ##
+    # @brief 1セルのコストの取得
+    # @param ix: x方向のセル番号
+    # @param iy: y方向のセル番号
+    # @return コスト
+    def getCost(self, ix, iy):
+        return self.__cost[iy, ix]
+
+    ##
+    # @brief セルが障害物の場合にtrueを返す
+    # @param ix: x方向のセル番号
+    # @param iy: y方向のセル番号
+    def isObstacle(self, ix, iy):
+        if not self.isInside(ix, iy):
+            return True
+        return self.__flat[self.toFlatIndex(ix, iy)] == np.inf
+
+    ##
+    # @brief セルがマップ内にある場合にtrueを返す
+    # @param ix: x方向のセル番号
+    # @param iy: y方向のセル番号
+    def isInside(self, ix, iy):
+        return 0 <= ix < self.__width and 0 <= iy < self.__height
+
+    ##
+    # @brief x方向のセル数の取得
+    def getWidth(self):
+        return self.__width
+
+    ##
+    # @brief y方向のセル数の取得
+    def getHeight(self):
+        return self.__height
+
+    ##
+    # @brief フラット配列の1行あたりの要素数（外周を含むx方向のセル数）の取得
+    def getStride(self):
+        return self.__stride
+
+    ##
+    # @brief 外周を障害物で囲ったフラット配列の取得
+    # @return コストのリスト（障害物はinf）
+    # @attention 探索器と共有するためコピーは返さない
+    def getFlatCost(self):
+        return self.__flat
+
+    ##
+    # @brief セル番号からフラット配列の添字に変換
+    # @param ix: x方向のセル番号
+    # @param iy: y方向のセル番号
+    # @return フラット配列の添字
+    def toFlatIndex(self, ix, iy):
+        return (iy + 1) * self.__stride + (ix + 1)
+
+    ##
+    # @brief フラット配列の添字からセル番号に変換
+    # @param idx: フラット配列の添字
+    # @return セル番号(ix, iy)
+    def fromFlatIndex(self, idx):
+        iy, ix = divmod(idx, self.__stride)
+        return ix - 1, iy - 1
+
+    ##
+    # @brief ワールド座標からセル番号に変換
+    # @param pose: ワールド座標（Pose2D）
+    # @return セル番号(ix, iy)
+    def toIndex(self, pose):
+        ix = int(np.floor((pose.x - self.origin.x) / self.resolution))
+        iy = int(np.floor((pose.y - self.origin.y) / self.resolution))
+        return ix, iy
+
+    ##
+    # @brief セル番号からセル中心のワールド座標に変換
+    # @param ix: x方向のセル番号
+    # @param iy: y方向のセル番号
+    # @param theta: 角度成分[rad]
+    # @return セル中心のワールド座標（Pose2D）
+    def toPose(self, ix, iy, theta=0):
+        return Pose2D(self.origin.x + (ix + 0.5) * self.resolution,
+                      self.origin.y + (iy + 0.5) * self.resolution,
+                      theta)
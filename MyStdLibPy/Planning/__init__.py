@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from .GridMap import *
+from .AStar import *
+from .DStarLite import *
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+##
+# @file Replay.py
+# @brief ログの再生によるコントローラの回帰テスト
+
+import numpy as np
+import MyStdLibPy.Replay.ReplayLog as ReplayLog
+
+##
+# @class Replay
+# @brief ログの再生によるコントローラの回帰テスト
+# @details 記録した入力をReplayLogから一定数ずつ読み出してバッチ版のコントローラに与え，
+#          得られた出力と記録された出力を比較する．読み出し，コントローラの駆動，比較は
+#          ジェネレータでつないでいるため，使用メモリはログの長さによらずchunk_sizeで決まる．
+
+class Replay:
+    ##
+    # @brief パラメータ構造体
+    class param_t:
+        def __init__(self):
+            self.atol = 0.0                  # < 一致とみなす誤差の絶対値
+            self.rtol = 0.0                  # < 一致とみなす誤差の相対値（記録された出力に対する比）
+            self.chunk_size = 65536          # < 1回に読み出すステップ数
+            self.stop_at_divergence = False  # < 最初の不一致で再生を打ち切るか
+
+    ##
+    # @brief 結果構造体
+    class result_t:
+        def __init__(self):
+            self.step_num = 0           # < 再生したステップ数
+            self.sample_num = 0         # < 比較した出力の数
+            self.divergence_num = 0     # < 不一致だった（ステップ, コントローラ）の組の数
+            self.first_divergence = -1  # < 最初に不一致となったステップ（無ければ-1）
+            self.first_channel = -1     # < 最初に不一致となったコントローラの番号（無ければ-1）
+            self.max_error = 0.0        # < 誤差の絶対値の最大値
+            self.mean_error = 0.0       # < 誤差の絶対値の平均
+            self.rms_error = 0.0        # < 誤差の二乗平均平方根
+
+    ##
+    # @brief コンストラクタ
+    # @param param: パラメータ構造体
+    def __init__(self, param=None):
+        self.__param = param if param is not None else Replay.param_t()
+
+    ##
+    # @brief パラメータの設定
+    # @param param: パラメータ構造体
+    def setParam(self, param):
+        self.__param = param
+
+    ##
+    # @brief PIDのログの再生
+    # @param log: ReplayLog.pidDtype()のログ（ReplayLogもしくはファイル名）
+    # @param controller: ログのコントローラ数と同じ要素数のPIDBatch（記録開始時の状態にしておく）
+    # @return 結果構造体
+    def replayPID(self, log, controller):
+        opened = self.__open(log)
+        try:
+            stream = self.__drivePID(opened.chunks(self.__param.chunk_size), controller)
+            return self.__evaluate(stream)
+        finally:
+            if opened is not log:
+                opened.close()
+
+    ##
+    # @brief PurePursuitControlのログの再生
+    # @param log: ReplayLog.purePursuitDtype()のログ（ReplayLogもしくはファイル名）
+    # @param fleet: ログのコントローラ番号をスロット番号として経路を登録したPurePursuitFleet（スロット数はログのコントローラ数と同じ）
+    # @return 結果構造体
+    def replayPurePursuit(self, log, fleet):
+        opened = self.__open(log)
+        try:
+            stream = self.__drivePurePursuit(opened.chunks(self.__param.chunk_size), fleet)
+            return self.__evaluate(stream)
+        finally:
+            if opened is not log:
+                opened.close()
+
+    @staticmethod
+    def __open(log):
+        if isinstance(log, ReplayLog):
+            return log
+        return ReplayLog(log)
+
+    # チャンクごとにPIDを駆動し，(先頭のステップ, 出力, 記録された出力)を返す
+    @staticmethod
+    def __drivePID(chunks, controller):
+        for step, records in chunks:
+            output = controller.updateSequence(records['target'], records['now_val'], records['dt'])
+            yield step, output, records['output']
+
+    # チャンクごとにPurePursuitFleetを駆動し，(先頭のステップ, 出力, 記録された出力)を返す
+    # 出力は(ステップ数, コントローラ数, 3)の配列
+    @staticmethod
+    def __drivePurePursuit(chunks, fleet):
+        for step, records in chunks:
+            output = fleet.updateSequence(records['pose'], records['dt'], records['index'])
+            yield step, output, records['output']
+
+    # 出力と記録された出力を比較して統計をとる
+    def __evaluate(self, stream):
+        param = self.__param
+        result = Replay.result_t()
+        error_sum = 0.0
+        error_sqr_sum = 0.0
+        for step, output, expected in stream:
+            error = np.abs(output - expected)
+            # 両方NaNなら一致，片方だけNaNなら不一致とする
+            both_nan = np.isnan(output) & np.isnan(expected)
+            error = np.where(both_nan, 0.0, error)
+            diverged = np.isnan(error) | (error > param.atol + param.rtol * np.abs(expected))
+            error = np.where(np.isnan(error), np.inf, error)
+
+            # コントローラごとにまとめる（PurePursuitControlはx, y, thetaのいずれかが不一致なら不一致）
+            diverged = diverged.reshape(len(diverged), expected.shape[1], -1).any(axis=2)
+
+            result.step_num += len(output)
+            result.sample_num += error.size
+            result.divergence_num += int(np.count_nonzero(diverged))
+            if len(error) > 0:
+                result.max_error = max(result.max_error, float(error.max()))
+            error_sum += float(error.sum())
+            error_sqr_sum += float(np.square(error).sum())
+
+            if result.first_divergence < 0 and np.any(diverged):
+                k, channel = np.unravel_index(np.argmax(diverged), diverged.shape)
+                result.first_divergence = step + int(k)
+                result.first_channel = int(channel)
+                if param.stop_at_divergence:
+                    break
+
+        if result.sample_num > 0:
+            result.mean_error = error_sum / result.sample_num
+            result.rms_error = float(np.sqrt(error_sqr_sum / result.sample_num))
+        return result
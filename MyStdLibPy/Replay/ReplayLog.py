@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+##
+# @file ReplayLog.py
+# @brief コントローラの入出力ログファイル
+
+import struct
+import numpy as np
+
+##
+# @class ReplayLog
+# @brief コントローラの入出力ログファイル
+# @details 1ステップを1レコードとした構造化配列を.npy形式で保存する．
+#          書き込み時はレコード数が確定するまでヘッダの領域を確保しておき，close()で書き戻す．
+#          読み込み時はメモリマップで開き，chunks()で一定数のレコードずつ取り出すため，
+#          ファイルの大きさによらず使用メモリは一定になる．
+
+class ReplayLog:
+    ##
+    # @brief コンストラクタ
+    # @param path: ファイル名
+    # @param dtype: レコード型（指定すると書き込み用に新規作成，Noneなら読み込み用に開く）
+    def __init__(self, path, dtype=None):
+        self.__path = path
+        if dtype is None:
+            self.__file = None
+            self.__data = np.load(path, mmap_mode='r', allow_pickle=False)
+            self.__dtype = self.__data.dtype
+            self.__size = len(self.__data)
+        else:
+            self.__data = None
+            self.__dtype = np.dtype(dtype)
+            self.__size = 0
+            # レコード数が最大桁数になっても収まるヘッダの大きさ（64の倍数）を確保する
+            self.__header_size = 64 * -(-(len(self.__headerDict(10 ** 19)) + 11) // 64)
+            self.__file = open(path, 'wb')
+            self.__writeHeader()
+
+    ##
+    # @brief PIDのログのレコード型
+    # @param n: コントローラ数
+    # @return レコード型（target, now_val, outputは長さn，dtは全コントローラ共通）
+    @staticmethod
+    def pidDtype(n):
+        return np.dtype([('target', '<f8', (n,)), ('now_val', '<f8', (n,)),
+                         ('dt', '<f8'), ('output', '<f8', (n,))])
+
+    ##
+    # @brief PurePursuitControlのログのレコード型
+    # @param n: コントローラ数
+    # @return レコード型（indexは経路データのインデックス，pose, outputは(n, 3)のx, y, theta）
+    @staticmethod
+    def purePursuitDtype(n):
+        return np.dtype([('index', '<i8', (n,)), ('pose', '<f8', (n, 3)),
+                         ('dt', '<f8'), ('output', '<f8', (n, 3))])
+
+    ##
+    # @brief レコード型の取得
+    def getDtype(self):
+        return self.__dtype
+
+    ##
+    # @brief レコード数の取得
+    def getSize(self):
+        return self.__size
+
+    ##
+    # @brief レコードを末尾に追加
+    # @param records: レコード型の配列
+    def append(self, records):
+        records = np.ascontiguousarray(records, dtype=self.__dtype)
+        self.__file.write(records.tobytes())
+        self.__size += len(records)
+
+    ##
+    # @brief ファイルを閉じる（書き込み時はヘッダにレコード数を書き込む）
+    def close(self):
+        if self.__file is not None:
+            self.__file.seek(0)
+            self.__writeHeader()
+            self.__file.close()
+            self.__file = None
+        self.__data = None
+
+    ##
+    # @brief 一定数ずつレコードを取り出すジェネレータ
+    # @param chunk_size: 1回に取り出すレコード数
+    # @param start: 取り出し始めるレコードの番号
+    # @return (先頭のレコードの番号, レコード型の配列)を順に返すジェネレータ
+    def chunks(self, chunk_size=65536, start=0):
+        for i in range(start, self.__size, chunk_size):
+            yield i, np.array(self.__data[i:i + chunk_size])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __headerDict(self, size):
+        return "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+            np.lib.format.dtype_to_descr(self.__dtype), size)
+
+    # .npy形式（version 1.0）のヘッダを書き込む
+    # レコード数によらず大きさが一定になるよう空白で埋める
+    def __writeHeader(self):
+        header = self.__headerDict(self.__size).ljust(self.__header_size - 11) + '\n'
+        self.__file.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1'))
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from .ReplayLog import *
+from .Replay import *
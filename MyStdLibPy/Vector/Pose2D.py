@@ -52,13 +52,10 @@ class Pose2D():
     # @param o: 回転中心の座標
     # @param angle: 回転させる角度[rad]
     def rotate(self, o, angle):
-        p = Pose2D.Pose2D(self.x - o.x, self.y - o.y, self.theta)
-        p.x = p.x * np.cos(angle) - p.y * np.sin(angle)
-        p.y = p.x * np.sin(angle) + p.y * np.cos(angle)
-        p.x += o.x
-        p.y += o.y
-        self.x = p.x
-        self.y = p.y
+        dx = self.x - o.x
+        dy = self.y - o.y
+        self.x = dx * np.cos(angle) - dy * np.sin(angle) + o.x
+        self.y = dx * np.sin(angle) + dy * np.cos(angle) + o.y
 
     ##
     # @brief このベクターをフォーマットした文字列を返す
@@ -82,7 +79,7 @@ class Pose2D():
     # @brief このベクトルの長さの2乘を返す
     # @return このベクトルの長さ2乘
     def sqrLength(self):
-        return self.qrMagnitude()
+        return self.sqrMagnitude()
 
     ##
     # @brief このベクトルの長さの2乘を返す
@@ -130,11 +127,9 @@ class Pose2D():
         if (t < 0):
             t = 0
 
-        v = a
-        v.x += (b.x - a.x) * t
-        v.y += (b.y - a.y) * t
-        v.theta += (b.theta - a.theta) * t
-        return v
+        return Pose2D(a.x + (b.x - a.x) * t,
+                      a.y + (b.y - a.y) * t,
+                      a.theta + (b.theta - a.theta) * t)
 
     ##
     # @brief ベクトルの要素同士の和（スカラとの和の場合は全ての要素に対して加算）
@@ -203,6 +198,7 @@ class Pose2D():
             self.x += other
             self.y += other
             self.theta += other
+        return self
 
     ##
     # @brief ベクトルの要素同士の差を代入（スカラとの差の場合は全ての要素に対して減算）
@@ -215,6 +211,7 @@ class Pose2D():
             self.x -= other
             self.y -= other
             self.theta -= other
+        return self
 
     ##
     # @brief 全ての要素に対してスカラ乗算して代入（ベクトル同士の乗算は未定義）
@@ -222,6 +219,7 @@ class Pose2D():
         self.x *= other
         self.y *= other
         self.theta *= other
+        return self
 
     ##
     # @brief 全ての要素に対してスカラ除算して代入（ベクトル同士の除算は未定義）
@@ -229,11 +227,12 @@ class Pose2D():
         self.x /= other
         self.y /= other
         self.theta /= other
+        return self
 
     ##
     # @brief 2つのベクトルが等しい場合にtrueを返す
     def __eq__(self, v):
-        return self.x == Pose2D.x and self.y == Pose2D.y and self.theta == Pose2D.theta
+        return self.x == v.x and self.y == v.y and self.theta == v.theta
 
     ##
     # @brief 2つのベクトルが等しい場合にfalseを返す
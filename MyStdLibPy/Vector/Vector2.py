@@ -48,13 +48,10 @@ class Vector2:
     # @param o: 回転中心の座標
     # @param angle: 回転させる角度[rad]
     def rotate(self, o, angle):
-        p = Vector2.Vector2(self.x - o.x, self.y - o.y)
-        p.x = p.x * np.cos(angle) - p.y * np.sin(angle)
-        p.y = p.x * np.sin(angle) + p.y * np.cos(angle)
-        p.x += o.x
-        p.y += o.y
-        self.x = p.x
-        self.y = p.y
+        dx = self.x - o.x
+        dy = self.y - o.y
+        self.x = dx * np.cos(angle) - dy * np.sin(angle) + o.x
+        self.y = dx * np.sin(angle) + dy * np.cos(angle) + o.y
 
     ##
     # @brief このベクターをフォーマットした文字列を返す
@@ -79,7 +76,7 @@ class Vector2:
     # @return 大きさが1のこのベクトル
 
     def normalized(self):
-        return self / self.length(self)
+        return self / self.length()
 
     ##
     # @brief このベクトルの長さの2乘を返す
@@ -99,7 +96,7 @@ class Vector2:
     # @param b: 2つ目のベクトル
     # @return 2つのベクトルの内積
     @staticmethod
-    def getDot(self, a,  b):
+    def getDot(a, b):
         return (a.x * b.x + a.y * b.y)
 
     ##
@@ -108,7 +105,7 @@ class Vector2:
     # @param b: 2つ目のベクトル
     # @return 2つのベクトルのなす角[rad]
     @staticmethod
-    def getAngle(self, a,  b):
+    def getAngle(a, b):
         return np.arctan2(b.y - a.y, b.x - a.x)
 
     ##
@@ -117,9 +114,8 @@ class Vector2:
     # @param b: 2つ目のベクトル
     # @return 2つのベクトルの距離を返す
     @staticmethod
-    def getDistance(self, a,  b):
-        v = Vector2.Vector2(b - a)
-        return v.magnitude()
+    def getDistance(a, b):
+        return (b - a).magnitude()
 
     ##
     # @brief ベクトルaとbの間をtで線形補間
@@ -128,16 +124,13 @@ class Vector2:
     # @param t: 媒介変数
     # @return 補間点
     @staticmethod
-    def leap(self, a, b, t):
+    def leap(a, b, t):
         if (t > 1):
             t = 1
         if (t < 0):
             t = 0
 
-        v = a
-        v.x += (b.x - a.x) * t
-        v.y += (b.y - a.y) * t
-        return v
+        return Vector2(a.x + (b.x - a.x) * t, a.y + (b.y - a.y) * t)
 
     ##
     # @brief ベクトルの要素同士の和（スカラとの和の場合は全ての要素に対して加算）
@@ -204,6 +197,7 @@ class Vector2:
         else:
             self.x += other
             self.y += other
+        return self
 
     ##
     # @brief ベクトルの要素同士の差を代入（スカラとの差の場合は全ての要素に対して減算）
@@ -214,23 +208,26 @@ class Vector2:
         else:
             self.x -= other
             self.y -= other
+        return self
 
     ##
     # @brief 全ての要素に対してスカラ乗算して代入（ベクトル同士の乗算は未定義）
     def __imul__(self, other):
         self.x *= other
         self.y *= other
+        return self
 
     ##
     # @brief 全ての要素に対してスカラ除算して代入（ベクトル同士の除算は未定義）
     def __itruediv__(self, other):
         self.x /= other
         self.y /= other
+        return self
 
     ##
     # @brief 2つのベクトルが等しい場合にtrueを返す
     def __eq__(self, v):
-        return self.x == Vector2.x and self.y == Vector2.y
+        return self.x == v.x and self.y == v.y
 
     ##
     # @brief 2つのベクトルが等しい場合にfalseを返す
@@ -5,3 +5,5 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from . import Vector
 from . import Control
+from . import Planning
+from . import Replay
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+
+# 関数を数回実行し，最短の実行時間[s]を返す
+@pytest.fixture
+def best_time():
+    def measure(func, repeat=5):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+    return measure
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+import io
+import pickle
+
+import AddPath
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from MyStdLibPy.Control import PID, PIDBatch, PIDAnalysis
+from MyStdLibPy.Replay import ReplayLog, Replay
+
+MODES = [PID.Mode().pPID, PID.Mode().sPID, PID.Mode().PI_D, PID.Mode().I_PD]
+
+value = st.floats(-100, 100, allow_nan=False)
+step = st.tuples(value, value, st.floats(1e-3, 1.0))
+gain = st.builds(PID.gain_t, st.floats(0, 10), st.floats(0, 10), st.floats(0, 1))
+
+
+@st.composite
+def params(draw):
+    param = PID.param_t()
+    param.mode = draw(st.sampled_from(MODES))
+    param.gain = draw(gain)
+    if draw(st.booleans()):
+        low = draw(st.floats(-50, 0))
+        param.need_saturation = True
+        param.output_min = low
+        param.output_max = low + draw(st.floats(0, 100))
+    return param
+
+
+# N個のパラメータに対して(T, N)の目標値と現在値，長さTの経過時間を生成する
+@st.composite
+def batches(draw):
+    param_list = draw(st.lists(params(), min_size=1, max_size=6))
+    n = len(param_list)
+    steps = draw(st.lists(st.tuples(st.lists(value, min_size=n, max_size=n),
+                                    st.lists(value, min_size=n, max_size=n),
+                                    st.floats(1e-3, 1.0)), min_size=1, max_size=20))
+    target = np.array([s[0] for s in steps])
+    now_val = np.array([s[1] for s in steps])
+    dt = np.array([s[2] for s in steps])
+    return param_list, target, now_val, dt
+
+
+def run(pid, steps):
+    outputs = []
+    for target, now_val, dt in steps:
+        pid.update(target, now_val, dt)
+        outputs.append(pid.getControlVal())
+    return outputs
+
+
+def make_batch(param_list):
+    batch = PIDBatch(len(param_list))
+    for i, p in enumerate(param_list):
+        batch.setParam(p, i)
+    return batch
+
+
+@given(batches())
+def test_batch_matches_scalar(problem):
+    param_list, target, now_val, dt = problem
+    pids = [PID(p) for p in param_list]
+    batch = make_batch(param_list)
+    for k in range(len(dt)):
+        batch.update(target[k], now_val[k], dt[k])
+        for i, pid in enumerate(pids):
+            pid.update(target[k, i], now_val[k, i], dt[k])
+        assert batch.getControlVal().tolist() == [pid.getControlVal() for pid in pids]
+
+
+@given(params(), st.lists(step, max_size=10), st.lists(step, min_size=1, max_size=10))
+def test_state_restore_is_bit_exact(param, before, after):
+    pid = PID(param)
+    run(pid, before)
+    restored = PID()
+    restored.setState(pid.getState())
+    assert restored.getState() == pid.getState()
+    assert run(restored, after) == run(pid, after)
+
+    f = io.BytesIO()
+    PID.saveStates(f, [pid, restored])
+    f.seek(0)
+    loaded = PID.loadStates(f)
+    assert [p.getState() for p in loaded] == [pid.getState(), restored.getState()]
+
+
+@given(batches())
+def test_batch_state_matches_scalar(problem):
+    param_list, target, now_val, dt = problem
+    pids = [PID(p) for p in param_list]
+    batch = make_batch(param_list)
+    for k in range(len(dt)):
+        batch.update(target[k], now_val[k], dt[k])
+        for i, pid in enumerate(pids):
+            pid.update(target[k, i], now_val[k, i], dt[k])
+    assert batch.getState().tobytes() == PID.getStates(pids).tobytes()
+
+    restored = PIDBatch()
+    restored.setState(PID.getStates(pids))
+    restored.update(target[0], now_val[0], dt[0])
+    batch.update(target[0], now_val[0], dt[0])
+    assert restored.getControlVal().tolist() == batch.getControlVal().tolist()
+
+
+@given(batches())
+def test_sequence_matches_update(problem):
+    param_list, target, now_val, dt = problem
+    batch = make_batch(param_list)
+    sequence = make_batch(param_list)
+    outputs = sequence.updateSequence(target, now_val, dt)
+    for k in range(len(dt)):
+        batch.update(target[k], now_val[k], dt[k])
+        assert outputs[k].tolist() == batch.getControlVal().tolist()
+    assert sequence.getState().tobytes() == batch.getState().tobytes()
+
+
+def test_replay_detects_divergence(tmp_path):
+    rng = np.random.default_rng(0)
+    param = PID.param_t()
+    param.mode = PID.Mode().PI_D
+    param.gain = PID.gain_t(1.2, 0.3, 0.05)
+    pids = [PID(param) for _ in range(3)]
+    records = np.zeros(500, ReplayLog.pidDtype(3))
+    records['target'] = rng.random((500, 3))
+    records['now_val'] = rng.random((500, 3))
+    records['dt'] = 0.01
+    for k in range(500):
+        for i, pid in enumerate(pids):
+            pid.update(records['target'][k, i], records['now_val'][k, i], 0.01)
+            records['output'][k, i] = pid.getControlVal()
+    path = str(tmp_path / 'pid.npy')
+    with ReplayLog(path, ReplayLog.pidDtype(3)) as log:
+        log.append(records[:200])
+        log.append(records[200:])
+
+    replay_param = Replay.param_t()
+    replay_param.chunk_size = 64
+    result = Replay(replay_param).replayPID(path, PIDBatch(3, param))
+    assert (result.step_num, result.divergence_num, result.max_error) == (500, 0, 0.0)
+
+    records['output'][321, 1] += 1e-6
+    np.save(path, records)
+    result = Replay(replay_param).replayPID(path, PIDBatch(3, param))
+    assert (result.first_divergence, result.first_channel, result.divergence_num) == (321, 1, 1)
+
+
+@settings(max_examples=30)
+@given(st.sampled_from(MODES), st.lists(gain, min_size=1, max_size=5), st.floats(0.01, 0.1))
+def test_analysis_step_response_matches_simulation(mode, gains, dt):
+    # 制御対象 y[k+1] = 0.9 y[k] + 0.1 u[k]
+    plant = ([0.0, 0.1], [1.0, -0.9])
+    analysis = PIDAnalysis(mode, gains, dt, plant)
+    response = analysis.stepResponse(50)
+
+    batch = PIDBatch(len(gains))
+    batch.setMode(mode)
+    for i, g in enumerate(gains):
+        batch.setGain(g, i)
+    y = np.zeros(len(gains))
+    simulated = []
+    for _ in range(50):
+        simulated.append(y.copy())
+        batch.update(1.0, y, dt)
+        y = 0.9 * y + 0.1 * batch.getControlVal()
+    simulated = np.array(simulated).T
+    finite = np.all(np.abs(simulated) < 1e6, axis=1)
+    np.testing.assert_allclose(response[finite], simulated[finite], rtol=1e-6, atol=1e-9)
+
+
+@given(st.sampled_from(MODES), gain, st.floats(0.01, 0.1), st.floats(0.01, 3.0))
+def test_analysis_frequency_response(mode, g, dt, w):
+    z = np.exp(1j * w * dt * np.pi / 3.2)
+    omega = np.array([w * np.pi / 3.2])
+    integral = dt / (1 - 1 / z) if mode == PID.Mode().sPID else dt / 2 * (1 + 1 / z) / (1 - 1 / z)
+    expected = g.Kp + g.Ki * integral + g.Kd * (1 - 1 / z) / dt
+    response = PIDAnalysis(mode, g, dt).frequencyResponse(omega, loop=False)
+    assert response[0, 0] == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_analysis_margins():
+    # L(z) = z^-1 / (1 - 0.5 z^-1)
+    analysis = PIDAnalysis(PID.Mode().pPID, PID.gain_t(1, 0, 0), 0.01, ([0, 1], [1, -0.5]))
+    gm, pm, w_pc, w_gc = analysis.margins(analysis.getFrequency(4096))
+    theta = np.arccos(0.25)
+    assert gm[0] == pytest.approx(20 * np.log10(1.5), rel=1e-6)
+    assert w_pc[0] == pytest.approx(np.pi / 0.01, rel=1e-6)
+    assert w_gc[0] == pytest.approx(theta / 0.01, rel=1e-4)
+    assert pm[0] == pytest.approx(180 - np.degrees(np.arctan2(np.sin(theta), np.cos(theta) - 0.5)), rel=1e-4)
+
+
+# 各モードの定義式をそのまま計算する参照実装
+def reference_pid(param, steps):
+    mode = PID.Mode()
+    kp, ki, kd = param.gain.Kp, param.gain.Ki, param.gain.Kd
+    e1 = e2 = 0.0
+    integral = 0.0
+    prev_val = 0.0
+    u = 0.0
+    outputs = []
+    for target, now_val, dt in steps:
+        e = target - now_val
+        integral += (e + e1) * dt / 2.0
+        if param.mode == mode.pPID:
+            u = kp * e + ki * integral + kd * (e - e1) / dt
+        elif param.mode == mode.sPID:
+            u = u + kp * (e - e1) + ki * e * dt + kd * (e - 2 * e1 + e2) / dt
+        elif param.mode == mode.PI_D:
+            u = kp * e + ki * integral - kd * (now_val - prev_val) / dt
+        elif param.mode == mode.I_PD:
+            u = -kp * now_val + ki * integral - kd * (now_val - prev_val) / dt
+        if param.need_saturation:
+            u = max(min(u, param.output_max), param.output_min)
+        outputs.append(u)
+        e2, e1 = e1, e
+        prev_val = now_val
+    return outputs
+
+
+@given(params(), st.lists(step, min_size=1, max_size=30))
+def test_pid_matches_reference(param, steps):
+    assert run(PID(param), steps) == pytest.approx(reference_pid(param, steps), rel=1e-9, abs=1e-6)
+
+
+@given(params(), st.lists(step, min_size=1, max_size=10), st.lists(step, min_size=1, max_size=10))
+def test_pid_reset(param, before, after):
+    pid = PID(param)
+    run(pid, before)
+    pid.reset()
+    assert run(pid, after) == run(PID(param), after)
+
+
+def make_params(n, seed=0):
+    rng = np.random.default_rng(seed)
+    param_list = []
+    for i in range(n):
+        param = PID.param_t()
+        param.mode = MODES[i % len(MODES)]
+        param.gain = PID.gain_t(*rng.random(3).tolist())
+        param_list.append(param)
+    return param_list
+
+
+def test_batch_throughput(best_time):
+    n = 1000
+    param_list = make_params(n)
+    pids = [PID(p) for p in param_list]
+    batch = PIDBatch(n)
+    for i, p in enumerate(param_list):
+        batch.setParam(p, i)
+    target = np.random.default_rng(1).random(n)
+    values = target.tolist()
+
+    def scalar():
+        for pid, v in zip(pids, values):
+            pid.update(1.0, v, 0.01)
+
+    assert best_time(scalar) > 5 * best_time(lambda: batch.update(1.0, target, 0.01))
+    assert batch.getControlVal().tolist() == [pid.getControlVal() for pid in pids]
+
+
+def test_sequence_throughput(best_time):
+    steps = 20000
+    param = make_params(2)[1]
+    rng = np.random.default_rng(2)
+    target = rng.random(steps)
+    now_val = rng.random(steps)
+    pid = PID(param)
+    batch = PIDBatch(1, param)
+
+    def scalar():
+        for t, v in zip(target.tolist(), now_val.tolist()):
+            pid.update(t, v, 0.01)
+
+    assert best_time(scalar, 1) > 5 * best_time(lambda: batch.updateSequence(target, now_val, 0.01), 1)
+    assert batch.getControlVal()[0] == pid.getControlVal()
+
+
+def test_state_throughput(best_time):
+    pids = [PID(p) for p in make_params(5000)]
+    states = PID.getStates(pids)
+    assert best_time(lambda: pickle.loads(pickle.dumps(pids)), 3) > \
+        1.5 * best_time(lambda: PID.setStates(pids, PID.getStates(pids)), 3)
+    assert PID.getStates(pids).tobytes() == states.tobytes()
+
+
+def test_replay_throughput(best_time, tmp_path):
+    steps = 50000
+    param = make_params(1)[0]
+    records = np.zeros(steps, ReplayLog.pidDtype(1))
+    records['target'][:, 0] = np.random.default_rng(3).random(steps)
+    records['dt'] = 0.01
+    batch = PIDBatch(1, param)
+    for k in range(steps):
+        batch.update(records['target'][k], records['now_val'][k], 0.01)
+        records['output'][k] = batch.getControlVal()
+    path = str(tmp_path / 'pid.npy')
+    np.save(path, records)
+
+    def stepwise():
+        pid = PIDBatch(1, param)
+        for k in range(steps):
+            pid.update(records['target'][k], records['now_val'][k], 0.01)
+
+    result = []
+    replay_time = best_time(lambda: result.append(Replay().replayPID(path, PIDBatch(1, param))), 3)
+    assert best_time(stepwise, 1) > 5 * replay_time
+    assert result[-1].divergence_num == 0
+
+
+def test_analysis_throughput(best_time):
+    gains = 1000
+    steps = 1000
+    rng = np.random.default_rng(4)
+    kp = rng.random(gains)
+    ki = rng.random(gains)
+    kd = rng.random(gains) * 0.01
+    plant = ([0.0, 0.1], [1.0, -0.9])
+    analysis = PIDAnalysis(PID.Mode().pPID, PID.gain_t(), 0.01, plant)
+    analysis.setGain(PID.Mode().pPID, kp, ki, kd, 0.01, plant)
+
+    simulated = np.empty((gains, steps))
+
+    def stepwise():
+        batch = PIDBatch(gains)
+        batch.setGain(PID.gain_t(kp, ki, kd))
+        y = np.zeros(gains)
+        for k in range(steps):
+            simulated[:, k] = y
+            batch.update(1.0, y, 0.01)
+            y = 0.9 * y + 0.1 * batch.getControlVal()
+
+    response = []
+    analysis_time = best_time(lambda: response.append(analysis.stepResponse(steps)), 3)
+    assert best_time(stepwise, 2) > 2 * analysis_time
+    np.testing.assert_allclose(response[-1], simulated, rtol=1e-6, atol=1e-9)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import heapq
+import math
+
+import AddPath
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from MyStdLibPy.Vector import Pose2D
+from MyStdLibPy.Planning import GridMap, AStar, DStarLite
+
+
+# 辞書とタプルで書いたダイクストラ法の参照実装
+def reference_cost(cost, start, goal, diagonal=True):
+    height, width = cost.shape
+    motions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+    if diagonal:
+        motions += [(dx, dy) for dx in (-1, 1) for dy in (-1, 1)]
+    best = {start: 0.0}
+    heap = [(0.0, start)]
+    while heap:
+        d, (x, y) = heapq.heappop(heap)
+        if (x, y) == goal:
+            return d
+        if d > best[(x, y)]:
+            continue
+        for dx, dy in motions:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height) or not np.isfinite(cost[ny, nx]):
+                continue
+            if dx and dy and (not np.isfinite(cost[y, nx]) or not np.isfinite(cost[ny, x])):
+                continue
+            nd = d + math.hypot(dx, dy) * (1.0 + cost[ny, nx])
+            if nd < best.get((nx, ny), math.inf):
+                best[(nx, ny)] = nd
+                heapq.heappush(heap, (nd, (nx, ny)))
+    return None
+
+
+def path_cost(grid_map, cost, path):
+    cells = [grid_map.toIndex(p) for p in path]
+    total = 0.0
+    for (x0, y0), (x1, y1) in zip(cells, cells[1:]):
+        assert max(abs(x1 - x0), abs(y1 - y0)) <= 1
+        assert np.isfinite(cost[y1, x1])
+        total += math.hypot(x1 - x0, y1 - y0) * (1.0 + cost[y1, x1])
+    return total
+
+
+@st.composite
+def maps(draw):
+    width = draw(st.integers(2, 15))
+    height = draw(st.integers(2, 15))
+    cells = st.one_of(st.floats(0, 3), st.just(math.inf))
+    cost = np.array(draw(st.lists(cells, min_size=width * height, max_size=width * height)))
+    cost = cost.reshape(height, width)
+    free = np.argwhere(np.isfinite(cost))
+    if len(free) == 0:
+        cost[0, 0] = 0.0
+        free = np.argwhere(np.isfinite(cost))
+    start = tuple(free[draw(st.integers(0, len(free) - 1))][::-1])
+    goal = tuple(free[draw(st.integers(0, len(free) - 1))][::-1])
+    return cost, start, goal
+
+
+@given(maps(), st.booleans())
+def test_astar_is_optimal(problem, diagonal):
+    cost, start, goal = problem
+    grid_map = GridMap(cost, resolution=0.5, origin=Pose2D(-1, 2, 0))
+    param = AStar.param_t()
+    param.allow_diagonal = diagonal
+    path = AStar(param, grid_map).plan(grid_map.toPose(*start), grid_map.toPose(*goal))
+    expected = reference_cost(cost, start, goal, diagonal)
+    if expected is None:
+        assert path == []
+    else:
+        assert path_cost(grid_map, cost, path) == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_set_cost_outside_map():
+    cost = np.zeros((3, 3))
+    grid_map = GridMap(cost)
+    planner = DStarLite(None, grid_map)
+    planner.plan(grid_map.toPose(0, 0), grid_map.toPose(2, 2))
+    flat = list(grid_map.getFlatCost())
+    for ix, iy in ((-1, 0), (0, -1), (3, 0), (0, 3)):
+        with pytest.raises(IndexError):
+            grid_map.setCost(ix, iy, 0.0)
+        with pytest.raises(IndexError):
+            planner.updateCell(ix, iy, 0.0)
+    assert grid_map.getFlatCost() == flat
+    assert [grid_map.getCost(ix, iy) for ix in range(3) for iy in range(3)] == [0.0] * 9
+
+
+def test_astar_follows_shared_param_change():
+    cost = np.zeros((5, 5))
+    grid_map = GridMap(cost)
+    param = AStar.param_t()
+    planner = AStar(param, grid_map)
+    start = grid_map.toPose(0, 0)
+    goal = grid_map.toPose(4, 4)
+    assert len(planner.plan(start, goal)) == 5
+    param.allow_diagonal = False
+    path = planner.plan(start, goal)
+    assert len(path) == 9
+    assert path_cost(grid_map, cost, path) == 8.0
+
+
+@settings(max_examples=50)
+@given(maps(), st.lists(st.tuples(st.integers(0, 14), st.integers(0, 14),
+                                  st.one_of(st.floats(0, 3), st.just(math.inf))), max_size=8))
+def test_dstar_lite_replans_optimally(problem, changes):
+    cost, start, goal = problem
+    grid_map = GridMap(cost.copy())
+    planner = DStarLite(None, grid_map)
+    start_pose = grid_map.toPose(*start)
+    goal_pose = grid_map.toPose(*goal)
+    for change in [None] + changes:
+        if change is not None:
+            ix, iy, c = change
+            if not grid_map.isInside(ix, iy) or (ix, iy) in (start, goal):
+                continue
+            planner.updateCell(ix, iy, c)
+            cost[iy, ix] = c
+        path = planner.plan(start_pose, goal_pose)
+        expected = reference_cost(cost, start, goal)
+        if expected is None:
+            assert path == []
+        else:
+            assert path_cost(grid_map, cost, path) == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_dstar_lite_blocked_endpoint():
+    cost = np.zeros((300, 300))
+    cost[150, 150] = math.inf
+    grid_map = GridMap(cost)
+    planner = DStarLite(None, grid_map)
+    free = grid_map.toPose(10, 10)
+    blocked = grid_map.toPose(150, 150)
+    assert planner.plan(blocked, free) == []
+    assert planner.plan(free, blocked) == []
+    assert planner.plan(grid_map.toPose(-1, 10), free) == []
+    assert len(planner.plan(grid_map.toPose(10, 12), free)) == 3
+
+
+@settings(max_examples=30)
+@given(st.integers(0, 15), st.booleans())
+def test_hybrid_astar_path_is_feasible(heading, reverse):
+    cost = np.zeros((40, 40))
+    cost[10:30, 20] = math.inf
+    grid_map = GridMap(cost, resolution=0.5)
+    param = AStar.param_t()
+    param.mode = AStar.Mode().hybrid
+    param.allow_reverse = reverse
+    start = Pose2D(6, 10, heading * 2 * math.pi / 16)
+    goal = Pose2D(17, 10, 0)
+    path = AStar(param, grid_map).plan(start, goal)
+    assert (path[0].x, path[0].y, path[0].theta) == (start.x, start.y, start.theta)
+    assert (path[-1].x, path[-1].y, path[-1].theta) == (goal.x, goal.y, goal.theta)
+    for a, b in zip(path[1:-2], path[2:-1]):
+        assert math.hypot(b.x - a.x, b.y - a.y) == pytest.approx(param.step, rel=0.05)
+    for p in path:
+        assert not grid_map.isObstacle(*grid_map.toIndex(p))
+
+
+def test_astar_throughput(best_time):
+    cost = np.zeros((150, 150))
+    cost[30:120, 75] = math.inf
+    grid_map = GridMap(cost)
+    planner = AStar(None, grid_map)
+    start = (1, 75)
+    goal = (148, 75)
+    path = []
+    planner_time = best_time(lambda: path.append(planner.plan(grid_map.toPose(*start), grid_map.toPose(*goal))), 3)
+    assert best_time(lambda: reference_cost(cost, start, goal), 1) > 2 * planner_time
+    assert path_cost(grid_map, cost, path[-1]) == pytest.approx(reference_cost(cost, start, goal))
+
+
+def test_dstar_lite_replan_throughput(best_time):
+    cost = np.zeros((150, 150))
+    cost[30:120, 75] = math.inf
+    grid_map = GridMap(cost)
+    start = grid_map.toPose(1, 75)
+    goal = grid_map.toPose(148, 75)
+    planner = DStarLite(None, grid_map)
+    initial_time = best_time(lambda: (planner.reset(), planner.plan(start, goal)), 1)
+
+    cells = iter(range(10, 140))
+    blocked = []
+
+    def replan():
+        ix = next(cells)
+        planner.updateCell(ix, 20, math.inf)
+        blocked.append(ix)
+        planner.plan(start, goal)
+
+    assert initial_time > 3 * best_time(replan, 5)
+    cost[20, blocked] = math.inf
+    assert path_cost(grid_map, cost, planner.plan(start, goal)) == pytest.approx(reference_cost(cost, (1, 75), (148, 75)))
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+import io
+import math
+
+import AddPath
+import numpy as np
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from MyStdLibPy.Vector import Pose2D
+from MyStdLibPy.Control import PID, PurePursuitControl, PurePursuitFleet
+from MyStdLibPy.Replay import ReplayLog, Replay
+
+coord = st.floats(-50, 50, allow_nan=False)
+pose = st.builds(Pose2D, coord, coord, st.floats(-math.pi, math.pi))
+path = st.lists(pose, min_size=1, max_size=10)
+gain = st.builds(PID.gain_t, st.floats(0, 5), st.floats(0, 1), st.floats(0, 0.1))
+
+
+def make_pid(g):
+    param = PID.param_t()
+    param.gain = g
+    return param
+
+
+def make_ppc(linear, angular, points):
+    param = PurePursuitControl.param_t()
+    param.fbc_linear = PID(make_pid(linear))
+    param.fbc_angular = PID(make_pid(angular))
+    return PurePursuitControl(param, list(points))
+
+
+def make_fleet(linear, angular, lookahead=1.0):
+    fleet_param = PurePursuitFleet.param_t()
+    fleet_param.lookahead = lookahead
+    fleet_param.fbc_linear = make_pid(linear)
+    fleet_param.fbc_angular = make_pid(angular)
+    return PurePursuitFleet(fleet_param, capacity=4)
+
+
+def assert_same_output(fleet, slot, ppc):
+    expected = ppc.getControlVal()
+    output = fleet.getControlVal(slot)
+    assert (output.x, output.y, output.theta) == pytest.approx(
+        (expected.x, expected.y, expected.theta), rel=1e-12, abs=1e-12)
+
+
+@given(gain, gain, st.lists(path, min_size=1, max_size=5), st.floats(0, 20), st.data())
+def test_fleet_matches_scalar(linear, angular, paths, lookahead, data):
+    fleet = make_fleet(linear, angular, lookahead)
+    ppcs = {}
+    for points in paths:
+        ppcs[fleet.addPath(points)] = make_ppc(linear, angular, points)
+
+    for _ in range(data.draw(st.integers(1, 8))):
+        if len(ppcs) > 1 and data.draw(st.booleans()):
+            slot = data.draw(st.sampled_from(sorted(ppcs)))
+            fleet.retirePath(slot)
+            del ppcs[slot]
+        if data.draw(st.booleans()):
+            points = data.draw(path)
+            ppcs[fleet.addPath(points)] = make_ppc(linear, angular, points)
+
+        poses = [data.draw(pose) for _ in range(fleet.getSlotNum())]
+        fleet.update([[p.x, p.y, p.theta] for p in poses], 0.1)
+        index = fleet.getIndex().tolist()
+        for slot, ppc in ppcs.items():
+            ppc.update(index[slot], poses[slot], 0.1)
+            assert_same_output(fleet, slot, ppc)
+
+
+@given(st.lists(path, min_size=1, max_size=5), st.floats(0, 20), st.data())
+def test_fleet_lookahead(paths, lookahead, data):
+    fleet = make_fleet(PID.gain_t(), PID.gain_t(), lookahead)
+    for points in paths:
+        fleet.addPath(points)
+    progress = [0] * len(paths)
+    for _ in range(3):
+        poses = [data.draw(pose) for _ in paths]
+        fleet.update([[p.x, p.y, p.theta] for p in poses], 0.1)
+        for i, (points, now) in enumerate(zip(paths, poses)):
+            # 追従中の点以降で注視距離以上離れた最初の点，無ければ終点
+            progress[i] = next((j for j in range(progress[i], len(points))
+                                if (points[j].x - now.x) ** 2 + (points[j].y - now.y) ** 2 >= lookahead ** 2),
+                               len(points) - 1)
+        assert fleet.getIndex().tolist() == progress
+
+
+@given(gain, gain, st.lists(path, min_size=1, max_size=5), st.data())
+def test_fleet_explicit_index_matches_scalar(linear, angular, paths, data):
+    fleet = make_fleet(linear, angular)
+    ppcs = [make_ppc(linear, angular, points) for points in paths]
+    for points in paths:
+        fleet.addPath(points)
+    for _ in range(data.draw(st.integers(1, 5))):
+        # PurePursuitControlと同じく負の番号は末尾から数える
+        index = [data.draw(st.integers(-len(points), len(points) - 1)) for points in paths]
+        poses = [data.draw(pose) for _ in paths]
+        fleet.update([[p.x, p.y, p.theta] for p in poses], 0.1, index)
+        for slot, ppc in enumerate(ppcs):
+            ppc.update(index[slot], poses[slot], 0.1)
+            assert_same_output(fleet, slot, ppc)
+
+
+@given(gain, gain, st.lists(path, min_size=1, max_size=5), st.data())
+def test_fleet_sequence_matches_update(linear, angular, paths, data):
+    fleet = make_fleet(linear, angular)
+    sequence = make_fleet(linear, angular)
+    for points in paths:
+        fleet.addPath(points)
+        sequence.addPath(points)
+    steps = data.draw(st.integers(0, 8))
+    index = [[data.draw(st.integers(-len(points), len(points) - 1)) for points in paths] for _ in range(steps)]
+    poses = [[[p.x, p.y, p.theta] for p in data.draw(st.lists(pose, min_size=len(paths), max_size=len(paths)))]
+             for _ in range(steps)]
+    dt = data.draw(st.lists(st.floats(1e-3, 1.0), min_size=steps, max_size=steps))
+    outputs = sequence.updateSequence(poses, dt, index)
+    for k in range(steps):
+        fleet.update(poses[k], dt[k], index[k])
+        assert outputs[k].tolist() == fleet.getControlVal().tolist()
+    assert sequence.getIndex().tolist() == fleet.getIndex().tolist()
+    assert sequence.getControlVal().tolist() == fleet.getControlVal().tolist()
+
+
+def test_fleet_index_out_of_range():
+    fleet = make_fleet(PID.gain_t(1), PID.gain_t(1))
+    fleet.addPath([Pose2D(10, 10, 0), Pose2D(20, 20, 0)])
+    fleet.addPath([Pose2D(1, 1, 0)])
+    for index in ([2, 0], [-3, 0], [0, 1], [0, -2]):
+        with pytest.raises(IndexError):
+            fleet.update(np.zeros((2, 3)), 0.1, index)
+    assert fleet.getControlVal().tolist() == [[0.0] * 3] * 2
+    fleet.update(np.zeros((2, 3)), 0.1, [-1, -1])
+    assert fleet.getControlVal(0).x == pytest.approx(-20 * 2 ** 0.5)
+
+
+@given(gain, gain, path, st.lists(pose, max_size=5), st.lists(pose, min_size=1, max_size=5))
+def test_ppc_state_restore_is_bit_exact(linear, angular, points, before, after):
+    ppc = make_ppc(linear, angular, points)
+    for now in before:
+        ppc.update(0, now, 0.1)
+    restored = make_ppc(PID.gain_t(), PID.gain_t(), [])
+    restored.setState(ppc.getState())
+    f = io.BytesIO()
+    PurePursuitControl.saveStates(f, [ppc])
+    f.seek(0)
+    loaded = PurePursuitControl.loadStates(f)[0]
+    for now in after:
+        for c in (ppc, restored, loaded):
+            c.update(len(points) - 1, now, 0.1)
+        outputs = [(c.getControlVal().x, c.getControlVal().theta) for c in (ppc, restored, loaded)]
+        assert outputs[0] == outputs[1] == outputs[2]
+
+
+@given(gain, path, st.lists(pose, max_size=5), st.lists(pose, min_size=1, max_size=5))
+def test_ppc_state_restore_with_shared_pid(g, points, before, after):
+    # 並進用と回転用に同じPIDを設定した場合
+    param = PurePursuitControl.param_t()
+    param.fbc_linear = param.fbc_angular = PID(make_pid(g))
+    ppc = PurePursuitControl(param, list(points))
+    for now in before:
+        ppc.update(0, now, 0.1)
+    restored = make_ppc(PID.gain_t(), PID.gain_t(), [])
+    restored.setState(ppc.getState())
+    f = io.BytesIO()
+    PurePursuitControl.saveStates(f, [ppc])
+    f.seek(0)
+    loaded = PurePursuitControl.loadStates(f)[0]
+    # 共有していない状態を共有しているPIDのオブジェクトに復元しても別々のPIDになる
+    unshared = make_ppc(g, g, points)
+    unshared.update(0, before[0] if before else after[0], 0.1)
+    shared = PurePursuitControl.param_t()
+    shared.fbc_linear = shared.fbc_angular = PID()
+    separate = PurePursuitControl(shared, [])
+    separate.setState(unshared.getState())
+    for now in after:
+        for c in (ppc, restored, loaded, unshared, separate):
+            c.update(len(points) - 1, now, 0.1)
+        outputs = [(c.getControlVal().x, c.getControlVal().theta) for c in (ppc, restored, loaded)]
+        assert outputs[0] == outputs[1] == outputs[2]
+        assert (unshared.getControlVal().x, unshared.getControlVal().theta) == \
+            (separate.getControlVal().x, separate.getControlVal().theta)
+
+
+# ランダムな経路と現在値に対するPurePursuitControlの入出力を記録したログを作る
+def record_pure_pursuit(file, paths, index, steps=300):
+    rng = np.random.default_rng(0)
+    ppcs = [make_ppc(PID.gain_t(1, 0.1), PID.gain_t(2), p) for p in paths]
+    records = np.zeros(steps, ReplayLog.purePursuitDtype(len(paths)))
+    records['dt'] = 0.05
+    records['index'] = index
+    records['pose'] = rng.random((steps, len(paths), 3))
+    for k in range(steps):
+        for i, ppc in enumerate(ppcs):
+            ppc.update(int(records['index'][k, i]), Pose2D(*records['pose'][k, i].tolist()), 0.05)
+            out = ppc.getControlVal()
+            records['output'][k, i] = [out.x, out.y, out.theta]
+    np.save(file, records)
+
+
+def test_replay_pure_pursuit(tmp_path):
+    rng = np.random.default_rng(1)
+    paths = [[Pose2D(*p) for p in rng.random((10, 3)).tolist()] for _ in range(3)]
+    file = str(tmp_path / 'ppc.npy')
+    record_pure_pursuit(file, paths, rng.integers(-10, 10, (300, 3)))
+
+    fleet = make_fleet(PID.gain_t(1, 0.1), PID.gain_t(2))
+    for p in paths:
+        fleet.addPath(p)
+    replay_param = Replay.param_t()
+    replay_param.chunk_size = 64
+    result = Replay(replay_param).replayPurePursuit(file, fleet)
+    assert result.step_num == 300
+    assert result.max_error < 1e-12
+
+
+def test_replay_closes_log_it_opened(tmp_path, monkeypatch):
+    path = [Pose2D(1, 2, 0), Pose2D(3, 4, 0)]
+    file = str(tmp_path / 'ppc.npy')
+    record_pure_pursuit(file, [path], np.zeros((10, 1), dtype=int), steps=10)
+    closed = []
+    close = ReplayLog.close
+    monkeypatch.setattr(ReplayLog, 'close', lambda self: (closed.append(self), close(self)))
+
+    fleet = make_fleet(PID.gain_t(1, 0.1), PID.gain_t(2))
+    fleet.addPath(path)
+    Replay().replayPurePursuit(file, fleet)
+    assert len(closed) == 1
+
+    log = ReplayLog(file)
+    fleet = make_fleet(PID.gain_t(1, 0.1), PID.gain_t(2))
+    fleet.addPath(path)
+    assert Replay().replayPurePursuit(log, fleet).divergence_num == 0
+    assert len(closed) == 1
+    assert log.getSize() == 10
+    log.close()
+
+
+@given(gain, gain, path, st.data())
+def test_ppc_matches_reference(linear, angular, points, data):
+    ppc = make_ppc(linear, angular, points)
+    ref_linear = PID(make_pid(linear))
+    ref_angular = PID(make_pid(angular))
+    for _ in range(data.draw(st.integers(1, 10))):
+        idx = data.draw(st.integers(0, len(points) - 1))
+        now = data.draw(pose)
+        ppc.update(idx, now, 0.1)
+
+        target = points[idx]
+        ref_linear.update(0, math.hypot(target.x - now.x, target.y - now.y), 0.1)
+        ref_angular.update(0, math.atan2(target.y - now.y, target.x - now.x) - now.theta, 0.1)
+        output = ppc.getControlVal()
+        assert output.x == pytest.approx(ref_linear.getControlVal(), rel=1e-9, abs=1e-9)
+        assert output.y == 0
+        assert output.theta == pytest.approx(ref_angular.getControlVal(), rel=1e-9, abs=1e-9)
+
+
+@given(path, path)
+def test_ppc_set_path_keeps_caller_list(first, second):
+    ppc = make_ppc(PID.gain_t(1), PID.gain_t(1), [])
+    ppc.setPath(first)
+    size = len(first)
+    ppc.setPath(second)
+    ppc.push_back(first)
+    assert len(first) == size
+
+
+def test_fleet_throughput(best_time):
+    robots = 1000
+    rng = np.random.default_rng(1)
+    paths = [[Pose2D(*p) for p in (rng.random((20, 3)) * 10).tolist()] for _ in range(robots)]
+    fleet_param = PurePursuitFleet.param_t()
+    fleet_param.fbc_linear = make_pid(PID.gain_t(1, 0.1))
+    fleet_param.fbc_angular = make_pid(PID.gain_t(2))
+    fleet = PurePursuitFleet(fleet_param)
+    ppcs = []
+    for p in paths:
+        fleet.addPath(p)
+        ppcs.append(make_ppc(PID.gain_t(1, 0.1), PID.gain_t(2), p))
+    poses = rng.random((robots, 3)) * 10
+    pose_list = [Pose2D(*p) for p in poses.tolist()]
+    index = rng.integers(0, 20, robots)
+    index_list = index.tolist()
+
+    def scalar():
+        for ppc, i, p in zip(ppcs, index_list, pose_list):
+            ppc.update(i, p, 0.1)
+
+    assert best_time(scalar, 1) > 5 * best_time(lambda: fleet.update(poses, 0.1, index), 1)
+    output = fleet.getControlVal()
+    assert output[:, 0] == pytest.approx([p.getControlVal().x for p in ppcs], rel=1e-12)
+    assert output[:, 2] == pytest.approx([p.getControlVal().theta for p in ppcs], rel=1e-12)
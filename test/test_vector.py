@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import cmath
+import math
+
+import AddPath
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from MyStdLibPy.Vector import Vector2, Pose2D
+
+coord = st.floats(-1e3, 1e3, allow_nan=False)
+nonzero = coord.filter(lambda v: abs(v) > 1e-3)
+angle = st.floats(-10, 10, allow_nan=False)
+approx = dict(rel=1e-9, abs=1e-9)
+
+
+@given(coord, coord, coord, coord)
+def test_vector2_arithmetic(ax, ay, bx, by):
+    a = Vector2(ax, ay)
+    b = Vector2(bx, by)
+    assert (a + b).x == ax + bx and (a + b).y == ay + by
+    assert (a - b).x == ax - bx and (a - b).y == ay - by
+    assert (a + 2).x == ax + 2 and (2 + a).y == 2 + ay
+    assert (3 - a).x == 3 - ax and (a - 3).y == ay - 3
+    assert (a * 2).x == ax * 2 and (2 * a).y == 2 * ay
+    assert (a / 4).x == ax / 4
+    assert a == Vector2(ax, ay) and a.equals(Vector2(ax, ay))
+    assert (a != b) == ((ax, ay) != (bx, by))
+
+
+@given(coord, coord, coord, coord)
+def test_vector2_inplace_keeps_object(ax, ay, bx, by):
+    a = Vector2(ax, ay)
+    c = a
+    a += Vector2(bx, by)
+    a -= 1
+    a *= 2
+    a /= 4
+    assert a is c
+    assert (a.x, a.y) == (((ax + bx) - 1) * 2 / 4, ((ay + by) - 1) * 2 / 4)
+
+
+@given(coord, coord, coord, coord, angle)
+def test_vector2_rotate(px, py, ox, oy, theta):
+    v = Vector2(px, py)
+    v.rotate(Vector2(ox, oy), theta)
+    expected = complex(ox, oy) + (complex(px, py) - complex(ox, oy)) * cmath.exp(1j * theta)
+    assert v.x == pytest.approx(expected.real, **approx)
+    assert v.y == pytest.approx(expected.imag, **approx)
+
+
+@given(coord, coord, coord, coord)
+def test_vector2_metrics(ax, ay, bx, by):
+    a = Vector2(ax, ay)
+    b = Vector2(bx, by)
+    assert a.length() == pytest.approx(math.hypot(ax, ay), **approx)
+    assert a.sqrLength() == pytest.approx(ax ** 2 + ay ** 2, **approx)
+    assert Vector2.getDot(a, b) == pytest.approx(ax * bx + ay * by, **approx)
+    assert Vector2.getAngle(a, b) == pytest.approx(math.atan2(by - ay, bx - ax), **approx)
+    assert Vector2.getDistance(a, b) == pytest.approx(math.hypot(bx - ax, by - ay), **approx)
+
+
+@given(nonzero, nonzero)
+def test_vector2_normalize(x, y):
+    v = Vector2(x, y)
+    n = v.normalized()
+    assert n.length() == pytest.approx(1.0, **approx)
+    assert (v.x, v.y) == (x, y)
+    v.normalize()
+    assert (v.x, v.y) == pytest.approx((n.x, n.y), **approx)
+
+
+@given(coord, coord, coord, coord, st.floats(-2, 3))
+def test_vector2_leap(ax, ay, bx, by, t):
+    a = Vector2(ax, ay)
+    v = Vector2.leap(a, Vector2(bx, by), t)
+    s = min(max(t, 0), 1)
+    assert (v.x, v.y) == pytest.approx((ax + (bx - ax) * s, ay + (by - ay) * s), **approx)
+    assert (a.x, a.y) == (ax, ay)
+
+
+@given(st.floats(0, 1e3), angle)
+def test_vector2_set_by_polar(r, theta):
+    v = Vector2()
+    v.setByPolar(r, theta)
+    assert complex(v.x, v.y) == pytest.approx(cmath.rect(r, theta), **approx)
+
+
+@given(coord, coord, coord, coord, coord, coord)
+def test_pose2d_arithmetic(ax, ay, at, bx, by, bt):
+    a = Pose2D(ax, ay, at)
+    b = Pose2D(bx, by, bt)
+    s = a + b
+    d = a - b
+    assert (s.x, s.y, s.theta) == (ax + bx, ay + by, at + bt)
+    assert (d.x, d.y, d.theta) == (ax - bx, ay - by, at - bt)
+    m = 2 * a
+    assert (m.x, m.y, m.theta) == (2 * ax, 2 * ay, 2 * at)
+    assert a == Pose2D(ax, ay, at) and a.equals(Pose2D(ax, ay, at))
+    assert (a != b) == ((ax, ay, at) != (bx, by, bt))
+
+    c = a
+    a += b
+    a *= 0.5
+    assert a is c
+    assert (a.x, a.y, a.theta) == ((ax + bx) * 0.5, (ay + by) * 0.5, (at + bt) * 0.5)
+
+
+@given(coord, coord, coord, coord, coord, angle)
+def test_pose2d_rotate(px, py, pt, ox, oy, theta):
+    p = Pose2D(px, py, pt)
+    p.rotate(Pose2D(ox, oy, 0), theta)
+    expected = complex(ox, oy) + (complex(px, py) - complex(ox, oy)) * cmath.exp(1j * theta)
+    assert p.x == pytest.approx(expected.real, **approx)
+    assert p.y == pytest.approx(expected.imag, **approx)
+    assert p.theta == pt
+
+
+@given(coord, coord, coord, coord, coord, coord, st.floats(-2, 3))
+def test_pose2d_metrics_and_leap(ax, ay, at, bx, by, bt, t):
+    a = Pose2D(ax, ay, at)
+    b = Pose2D(bx, by, bt)
+    assert a.length() == pytest.approx(math.hypot(ax, ay), **approx)
+    assert a.sqrLength() == pytest.approx(ax ** 2 + ay ** 2, **approx)
+    assert Pose2D.getDot(a, b) == pytest.approx(ax * bx + ay * by, **approx)
+    assert Pose2D.getAngle(a, b) == pytest.approx(math.atan2(by - ay, bx - ax), **approx)
+    assert Pose2D.getDistance(a, b) == pytest.approx(math.hypot(bx - ax, by - ay), **approx)
+
+    v = Pose2D.leap(a, b, t)
+    s = min(max(t, 0), 1)
+    assert (v.x, v.y, v.theta) == pytest.approx(
+        (ax + (bx - ax) * s, ay + (by - ay) * s, at + (bt - at) * s), **approx)
+    assert (a.x, a.y, a.theta) == (ax, ay, at)